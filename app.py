@@ -1,9 +1,16 @@
+import time
+
 import streamlit as st
-import pandas as pd
-from PIL import Image
-import qrcode
-from io import BytesIO
-import fitz  # PyMuPDF for PDF rendering
+
+# Heavy dependencies (pandas, SciPy, PyMuPDF, qrcode) are imported by the
+# pages or background tasks that need them, so other pages and cold starts
+# don't pay for them.
+from documents import SIDEBAR_DOCUMENTS, document_download_button, pdf_viewer, show_page
+from images import column_width, responsive_image, start_prebuild
+from ingest import start_ingest_watch
+from metrics import debug_overlay, record, start_metrics_server, timed
+from pdf_search import search_sidebar, start_index_build
+from qr_assets import ASRG_LINKS, qr_svg, start_prewarm
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -11,6 +18,25 @@ st.set_page_config(
     layout="wide"
 )
 
+start_prewarm()
+start_prebuild()
+start_ingest_watch()
+start_metrics_server()
+start_index_build()
+
+# Study Documents viewer label -> document key
+VIEWER_DOCUMENTS = {"Research Study": "study", "Report Presentation": "presentation"}
+
+
+def open_document_page(name, page):
+    """Search hit callback: show the page in the Study Documents viewer."""
+    st.session_state["menu"] = "Study Documents"
+    st.session_state["viewer-document"] = next(
+        label for label, key in VIEWER_DOCUMENTS.items() if key == name
+    )
+    show_page(name, page)
+
+
 # --- SIDEBAR NAVIGATION ---
 menu = st.sidebar.radio(
     "Navigation",
@@ -23,9 +49,12 @@ menu = st.sidebar.radio(
         "Discussion",
         "Conclusion",
         "Acknowledgments",
-        "References"
-    ]
+        "References",
+        "Study Documents"
+    ],
+    key="menu",
 )
+page_started = time.perf_counter()
 
 # --- RESEARCHER PROFILE ---
 if menu == "Researcher Profile":
@@ -36,8 +65,8 @@ if menu == "Researcher Profile":
     with col1:
         # Load your local researcher image
         try:
-            researcher_img = Image.open("profile_pic.png")
-            st.image(researcher_img, caption="Venerate Mdaka", use_column_width=True)
+            researcher_img = responsive_image("profile_pic.png", column_width(1 / 3))
+            st.image(researcher_img, caption="Venerate Mdaka", use_container_width=True)
         except:
             st.warning("Researcher image not found. Please make sure 'profile_pic.png' is in the correct folder.")
     
@@ -103,22 +132,14 @@ if menu == "Researcher Profile":
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📄 Documents")
 
-# Updated file paths
-with open("Report_Presentation.pdf", "rb") as file:
-    st.sidebar.download_button(
-        label="📊 Download Report Presentation (PDF)",
-        data=file,
-        file_name="Report_Presentation.pdf",
-        mime="application/pdf"
-    )
+# Document bytes are only read (once, into a shared cache) when downloaded
+with timed("sidebar_documents"):
+    for name in SIDEBAR_DOCUMENTS:
+        document_download_button(name, st.sidebar)
 
-with open("Research_study.pdf", "rb") as file:
-    st.sidebar.download_button(
-        label="📘 Download Research Study (PDF)",
-        data=file,
-        file_name="Research_study.pdf",
-        mime="application/pdf"
-    )
+# Queries read the prebuilt on-disk index, never the PDFs themselves
+with timed("sidebar_search"):
+    search_sidebar(open_document_page)
 
 
 # --- STUDY OVERVIEW ---
@@ -151,14 +172,9 @@ elif menu == "Ethical Clearance":
     st.subheader("Ethical Clearance")
     st.markdown("Ethical approval was obtained prior to field sampling and laboratory analysis.")
 
-    # Render PDF as image using PyMuPDF
+    # Rendered once per page and DPI into the on-disk page cache
     try:
-        pdf_path = "Ethical_clearance.pdf"
-        doc = fitz.open(pdf_path)
-        page = doc.load_page(0)  # first page
-        pix = page.get_pixmap()
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        st.image(img, caption="Ethical Clearance Approval", use_container_width=True)
+        pdf_viewer("ethics", caption="Ethical Clearance Approval")
     except Exception as e:
         st.error(f"Failed to render Ethical Clearance PDF. Error: {e}")
 
@@ -168,7 +184,7 @@ elif menu == "Methods":
 
     # Study Area
     st.markdown("### Study Area")
-    st.image("Study_Area_Map.png", use_container_width=True)
+    st.image(responsive_image("Study_Area_Map.png", column_width()), use_container_width=True)
 
     st.markdown("""
     Sampling was conducted along the Crocodile River during S1 (cool-dry) and
@@ -218,230 +234,69 @@ elif menu == "Methods":
 
 # --- RESULTS ---
 elif menu == "Results":
+    import results
+
     st.subheader("Results")
 
     # 1. Environmental Variables
     st.markdown("## 1. Environmental Variables")
-    st.image("PCA_Biplot.png", use_container_width=True)
-    st.markdown("""
-    PCA explained 68.1% of the variance in environmental variables.
-    A clear separation between the two seasons was observed.  
-    **Season 1 (S1, winter)** exhibited greater variability in physio-chemical conditions,  
-    while **Season 2 (S2, spring)** maintained more stable conditions.
-    """)
+    results.environmental_section()
 
     # Table 1: Seasonal Water Quality Comparison
     st.markdown("### Table 1: Statistical results for seasonal water quality comparison")
-    table1_html = """
-    <table style="width:90%; border-collapse: collapse; font-size:12px;">
-        <tr style="background-color:#f2f2f2;">
-            <th style="border:1px solid black; padding:3px;">Variable</th>
-            <th style="border:1px solid black; padding:3px;">Test Statistics</th>
-            <th style="border:1px solid black; padding:3px;">p-value</th>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Temp</td>
-            <td style="border:1px solid black; padding:3px;">t = -9.44</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">p = 0.001953 P<0.05</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">pH</td>
-            <td style="border:1px solid black; padding:3px;">Z = 2.6656</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">p = 0.0039063 P<0.05</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">TDS</td>
-            <td style="border:1px solid black; padding:3px;">t = -6.044</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">p = 0.0019531 P<0.05</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">ORP</td>
-            <td style="border:1px solid black; padding:3px;">Z = 1.78</td>
-            <td style="border:1px solid black; padding:3px;">p = 0.083984</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">%DO</td>
-            <td style="border:1px solid black; padding:3px;">Z = 17838</td>
-            <td style="border:1px solid black; padding:3px;">p = 0.083984</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">EC</td>
-            <td style="border:1px solid black; padding:3px;">t = -1.9245</td>
-            <td style="border:1px solid black; padding:3px;">p = 0.0855938</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Phosphorus</td>
-            <td style="border:1px solid black; padding:3px;">t = -1.1851</td>
-            <td style="border:1px solid black; padding:3px;">p = 0.249</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">P Pentoxide</td>
-            <td style="border:1px solid black; padding:3px;">t = -1.356</td>
-            <td style="border:1px solid black; padding:3px;">p = 0.19922</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Phosphate</td>
-            <td style="border:1px solid black; padding:3px;">t = -1.66</td>
-            <td style="border:1px solid black; padding:3px;">p = 0.166</td>
-        </tr>
-    </table>
-    """
-    st.markdown(table1_html, unsafe_allow_html=True)
+    results.water_quality_table()
 
  # 2. Species Composition
     st.markdown("## 2. Species Composition")
-    st.markdown("""
-    *4,157 individuals* were collected in S1 and *604 individuals* in S2.
-    - S1: Natural (2,232), Plastics (1,916)  
-    - S2: Natural (181), Plastics (423)  
-    """)
+    results.composition_section()
 
 
     # 3. Taxonomic Diversity
-      # Diversity indices images
+    # Diversity indices computed from the macroinvertebrate counts
     st.markdown("## 3. Taxonomic Diversity")
-    col1, col2, col3 = st.columns(3)
-    
-    try:
-        col1.image("Abundance1.png", caption="Abundance", use_container_width=True)
-    except:
-        col1.warning("Abundance1.png not found")
-    
-    try:
-        col2.image("Evenness5.png", caption="Evenness", use_container_width=True)
-    except:
-        col2.warning("Evenness5.png not found")
-    
-    try:
-        col3.image("Shannon2.png", caption="Shannon Index", use_container_width=True)
-    except:
-        col3.warning("Shannon2.png not found")
+    # Table 2 and its interpretation follow the selected season pair
+    results.diversity_section()
 
-    col4, col5 = st.columns(2)
-    
-    try:
-        col4.image("Simpson4.png", caption="Simpson Index", use_container_width=True)
-    except:
-        col4.warning("Simpson4.png not found")
-    
-    try:
-        col5.image("Species_richness3.png", caption="Species Richness", use_container_width=True)
-    except:
-        col5.warning("Species_richness3.png not found")
-
-    # Table 2: Diversity indices
-    st.markdown("### Table 2: Significance of Macroinvertebrate Diversity Indices Between Substrates and Seasons")
-    table2_html = """
-    <table style="width:90%; border-collapse: collapse; font-size:12px;">
-        <tr style="background-color:#f2f2f2;">
-            <th style="border:1px solid black; padding:3px;">Diversity indices</th>
-            <th style="border:1px solid black; padding:3px;">Substrates</th>
-            <th style="border:1px solid black; padding:3px;">Seasons</th>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Abundance</td>
-            <td style="border:1px solid black; padding:3px;">0.38318 (P>0.05)</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">0.0016899 (P<0.05)</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Species richness</td>
-            <td style="border:1px solid black; padding:3px;">0.17626 (P>0.05)</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">0.00011253 (P<0.05)</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Evenness</td>
-            <td style="border:1px solid black; padding:3px;">0.30899 (P>0.05)</td>
-            <td style="border:1px solid black; padding:3px;">0.14237 (P>0.05)</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Simpson diversity</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">0.0136 (P<0.05)</td>
-            <td style="border:1px solid black; padding:3px;">0.064322 (P>0.05)</td>
-        </tr>
-        <tr>
-            <td style="border:1px solid black; padding:3px; color:blue;">Shannon</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">0.0106 (P<0.05)</td>
-            <td style="border:1px solid black; padding:3px; color:red; font-weight:bold;">0.0068626 (P<0.05)</td>
-        </tr>
-    </table>
-    """
-    st.markdown(table2_html, unsafe_allow_html=True)
-
-    # Additional diversity interpretation
-    st.markdown("""
-    Evenness and Simpson diversity did not differ significantly between the two seasons.  
-    Simpson diversity showed significant variation in substrates (<span style="color:red; font-weight:bold;">P<0.05</span>).
-    """, unsafe_allow_html=True)
+    # S1 has roughly seven times the individuals of S2: compare at equal effort
+    st.markdown("### Rarefaction and bootstrap confidence intervals")
+    results.rarefaction_section()
 
     # 4. Datasets (Excel)
+    # Each dataset is a fragment: filtering or paging reruns only that dataset
     st.markdown("## 4. Datasets (Excel)")
-    try:
-        df_macro = pd.read_excel("Macroinvertebrates_Season1_2.xlsx")
-        df_water = pd.read_excel("Water_Parameters_Season1_2.xlsx")
-        df_div = pd.read_excel("Diversity_Indices.xlsx")
-
-        st.write("### Macroinvertebrates Data")
-        st.dataframe(df_macro, use_container_width=True)
-        st.download_button(
-            label="Download Macroinvertebrates Data",
-            data=open("Macroinvertebrates_Season1_2.xlsx", "rb").read(),
-            file_name="Macroinvertebrates_Season1_2.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
-        st.write("### Water Parameters Data")
-        st.dataframe(df_water, use_container_width=True)
-        st.download_button(
-            label="Download Water Parameters Data",
-            data=open("Water_Parameters_Season1_2.xlsx", "rb").read(),
-            file_name="Water_Parameters_Season1_2.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
-        st.write("### Diversity Indices Data")
-        st.dataframe(df_div, use_container_width=True)
-        st.download_button(
-            label="Download Diversity Indices Data",
-            data=open("Diversity_Indices.xlsx", "rb").read(),
-            file_name="Diversity_Indices.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
-    except Exception as e:
-        st.error(f"Excel dataset not found or failed to load. Error: {e}")
+    for name in results.DATASET_TITLES:
+        results.dataset_section(name)
+    results.bundle_download()
 
     # 5. PERMANOVA & SIMPER
     st.markdown("## 5. PERMANOVA & SIMPER Results")
-    perm_html = """
-    <ul>
-        <li><strong>PERMANOVA</strong>
-            <ul>
-                <li><span style="color:blue;">Substrate:</span> Not significant (<span style="color:red; font-weight:bold;">p = 0.711</span>, F = 0.820)</li>
-                <li><span style="color:blue;">Season:</span> Highly significant (<span style="color:red; font-weight:bold;">p = 0.001</span>, F = 2.369)</li>
-                <li><span style="color:blue;">Substrate × Season:</span> Significant (<span style="color:red; font-weight:bold;">p = 0.017</span>, F = 1.443)</li>
-            </ul>
-        </li>
-        <li><strong>SIMPER</strong>
-            <ul>
-                <li>Chironominae: 21.4% of dissimilarity, plastics (52.6%) & natural substrates (32.3%)</li>
-                <li>Tanypodinae: 15.4% dissimilarity, natural substrates (52%) & plastics (16.9%)</li>
-                <li>Marsupiobdella africana, Stenophysa marmota, and Culicine: &lt;1% each</li>
-            </ul>
-        </li>
-    </ul>
-    """
-    st.markdown(perm_html, unsafe_allow_html=True)
+    results.permanova_section()
+
+    st.markdown("### SIMPER: taxon contributions to Bray–Curtis dissimilarity")
+    results.simper_section()
+
+    # Same cached distance matrices as PERMANOVA
+    st.markdown("### NMDS ordination of the macroinvertebrate communities")
+    results.nmds_section()
 
 # --- DISCUSSION ---
 elif menu == "Discussion":
     st.subheader("Discussion")
-    
-    st.markdown("""
+
+    # Same cached counts as the Results page
+    try:
+        from diversity import abundance_totals
+
+        collected = abundance_totals().sum(axis=1)
+        s1_count, s2_count = (f" ({collected[season]:,} individuals)" for season in ("S1", "S2"))
+    except Exception:
+        s1_count = s2_count = ""
+    st.markdown(f"""
     ### Key Findings Discussion
     
     #### 1. Seasonal Patterns
-    - **S1 (Cool-Dry):** Higher abundance (4,157 individuals) due to stable conditions
-    - **S2 (Wet-Cool):** Lower abundance (604 individuals) likely due to flow disturbance
+    - **S1 (Cool-Dry):** Higher abundance{s1_count} due to stable conditions
+    - **S2 (Wet-Cool):** Lower abundance{s2_count} likely due to flow disturbance
     - **Macroplastics** served as refuge habitats during high-flow conditions
     
     #### 2. Substrate Comparison
@@ -456,9 +311,18 @@ elif menu == "Discussion":
     """)
     
     with st.expander("Environmental Factors"):
-        st.markdown("""
+        # Same cached PCA (study variables) as the Results page
+        try:
+            from ordination import water_pca
+
+            pca_share = f"{water_pca()[2].iloc[:2].sum():.1%}"
+        except Exception:
+            pca_share = None
+        pca_line = (f"PCA (PC1 and PC2) explained {pca_share} of the variance in environmental variables"
+                    if pca_share else "PCA summarised most of the variance in environmental variables")
+        st.markdown(f"""
         **Water Quality Influence:**
-        - PCA showed 68.1% variance explained by environmental variables
+        - {pca_line}
         - Clear seasonal separation in water quality
         - Temperature and flow regime primary drivers
         """)
@@ -507,23 +371,14 @@ elif menu == "Acknowledgments":
 
     # Logos
     col1, col2 = st.columns(2)
-    col1.image("UMP_Logo.png", caption="University of Mpumalanga", use_container_width=True)
-    col2.image("NRF_Logo.png", caption="National Research Foundation", use_container_width=True)
-
-    # QR codes for ASRG website & Facebook
-    urls = {
-        "ASRG Facebook": "https://www.facebook.com/AquaticSystemsResearchGroup",
-        "ASRG Website": "http://www.aquasystems-res.com"
-    }
-
-    for name, url in urls.items():
-        qr = qrcode.QRCode(box_size=4)
-        qr.add_data(url)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        st.image(buf, caption=f"Scan QR Code for {name}")
+    col1.image(responsive_image("UMP_Logo.png", column_width(1 / 2)),
+               caption="University of Mpumalanga", use_container_width=True)
+    col2.image(responsive_image("NRF_Logo.png", column_width(1 / 2)),
+               caption="National Research Foundation", use_container_width=True)
+
+    # QR codes for ASRG website & Facebook (pre-generated SVGs from the shared cache)
+    for name, url in ASRG_LINKS.items():
+        st.image(qr_svg(url), caption=f"Scan QR Code for {name}")
 
 # --- REFERENCES ---
 elif menu == "References":
@@ -540,6 +395,15 @@ elif menu == "References":
 
     """)
 
+# --- STUDY DOCUMENTS ---
+elif menu == "Study Documents":
+    st.subheader("Study Documents")
+    choice = st.radio("Document", list(VIEWER_DOCUMENTS), horizontal=True, key="viewer-document")
+    try:
+        pdf_viewer(VIEWER_DOCUMENTS[choice])
+    except Exception as e:
+        st.error(f"Failed to render {choice} PDF. Error: {e}")
+
 # --- FOOTER ---
 st.markdown("---")
 footer_col1, footer_col2, footer_col3 = st.columns(3)
@@ -550,6 +414,10 @@ with footer_col2:
 with footer_col3:
     st.caption("BSc Honours Research Project")
 
+# --- METRICS ---
+record(f"page:{menu}", time.perf_counter() - page_started)
+debug_overlay()
+
 
 
 
@@ -0,0 +1,140 @@
+"""Altair chart builders for the Results page."""
+
+import altair as alt
+import pandas as pd
+
+SUBSTRATE_COLORS = alt.Scale(domain=["Plastic", "Natural"], range=["#1f77b4", "#2ca02c"])
+
+
+def index_boxplot(df, index, label):
+    """Box plot of one diversity index per season, split by substrate."""
+    return (
+        alt.Chart(df.dropna(subset=[index]), title=label)
+        .mark_boxplot(extent="min-max")
+        .encode(
+            x=alt.X("season:N", title="Season"),
+            xOffset="substrate:N",
+            y=alt.Y(f"{index}:Q", title=label),
+            color=alt.Color("substrate:N", title="Substrate", scale=SUBSTRATE_COLORS),
+            tooltip=["season", "site", "substrate", alt.Tooltip(f"{index}:Q", format=".3f")],
+        )
+    )
+
+
+# S1 and S2 keep their colours; ingested seasons take the following ones
+SEASON_COLORS = alt.Scale(range=["#1f77b4", "#d62728", "#ff7f0e", "#9467bd", "#8c564b", "#17becf"])
+
+
+def pca_biplot(scores, loadings, explained, x="PC1", y="PC2"):
+    """Interactive PCA biplot: sample scores plus scaled variable loadings."""
+    scale = 0.8 * scores[[x, y]].abs().to_numpy().max() / loadings[[x, y]].abs().to_numpy().max()
+    arrows = loadings[[x, y]].mul(scale).reset_index()
+    arrows["origin"] = 0.0
+
+    x_title = f"{x} ({explained[x]:.1%})"
+    y_title = f"{y} ({explained[y]:.1%})"
+    points = (
+        alt.Chart(scores)
+        .mark_circle(size=80)
+        .encode(
+            x=alt.X(f"{x}:Q", title=x_title),
+            y=alt.Y(f"{y}:Q", title=y_title),
+            color=alt.Color("season:N", title="Season", scale=SEASON_COLORS),
+            tooltip=["season", "site", alt.Tooltip(f"{x}:Q", format=".2f"),
+                     alt.Tooltip(f"{y}:Q", format=".2f")],
+        )
+    )
+    rules = alt.Chart(arrows).mark_rule(color="gray").encode(
+        x="origin:Q", y="origin:Q", x2=f"{x}:Q", y2=f"{y}:Q"
+    )
+    labels = alt.Chart(arrows).mark_text(color="black", dy=-6).encode(
+        x=f"{x}:Q", y=f"{y}:Q", text="Variable:N"
+    )
+    return (rules + labels + points).interactive()
+
+
+def scree_plot(explained):
+    """Variance explained per component with the cumulative curve."""
+    df = pd.DataFrame({
+        "Component": explained.index,
+        "Explained": explained.to_numpy(),
+        "Cumulative": explained.cumsum().to_numpy(),
+    })
+    order = list(explained.index)
+    bars = alt.Chart(df, title="Scree plot").mark_bar().encode(
+        x=alt.X("Component:N", sort=order),
+        y=alt.Y("Explained:Q", axis=alt.Axis(format="%"), title="Variance explained"),
+        tooltip=[alt.Tooltip("Explained:Q", format=".1%"), alt.Tooltip("Cumulative:Q", format=".1%")],
+    )
+    line = alt.Chart(df).mark_line(point=True, color="black").encode(
+        x=alt.X("Component:N", sort=order), y="Cumulative:Q"
+    )
+    return bars + line
+
+
+def rarefaction_plot(curves):
+    """Richness against individuals per group, with interval bands.
+
+    Rarefied parts of the curves are solid, extrapolated parts dashed. Only
+    the plotted columns are sent, labels as categoricals and numbers as
+    32-bit, which keeps the chart data small.
+    """
+    df = curves.assign(group=curves["season"] + " " + curves["substrate"])
+    df["part"] = df["method"].replace({"observed": "interpolated"})
+    # The observed point closes the rarefied line and starts the extrapolated one
+    df = pd.concat([df, df[df["method"] == "observed"].assign(part="extrapolated")])
+    df = df[["group", "part", "method", "individuals", "richness", "lower", "upper"]].astype({
+        "group": "category", "part": "category", "method": "category", "individuals": "int32",
+        "richness": "float32", "lower": "float32", "upper": "float32",
+    })
+    base = alt.Chart(df, title="Rarefaction and extrapolation").encode(
+        x=alt.X("individuals:Q", title="Individuals"),
+        color=alt.Color("group:N", title="Season / substrate"),
+    )
+    band = base.mark_area(opacity=0.15).encode(y="lower:Q", y2="upper:Q", detail="part:N")
+    lines = base.mark_line().encode(
+        y=alt.Y("richness:Q", title="Species richness"),
+        strokeDash=alt.StrokeDash("part:N", title="Curve", sort=["interpolated", "extrapolated"]),
+        tooltip=["group", "individuals", "method", alt.Tooltip("richness:Q", format=".1f"),
+                 alt.Tooltip("lower:Q", format=".1f"), alt.Tooltip("upper:Q", format=".1f")],
+    )
+    observed = base.transform_filter(alt.datum.method == "observed").mark_point(
+        filled=True, size=70
+    ).encode(y="richness:Q")
+    return band + lines + observed
+
+
+def nmds_plot(scores, stress, x="NMDS1", y="NMDS2"):
+    """NMDS sample scores by season and substrate."""
+    return (
+        alt.Chart(scores, title=f"NMDS (stress = {stress:.3f})")
+        .mark_point(size=80, filled=True)
+        .encode(
+            x=alt.X(f"{x}:Q", title=x),
+            y=alt.Y(f"{y}:Q", title=y),
+            color=alt.Color("season:N", title="Season", scale=SEASON_COLORS),
+            shape=alt.Shape("substrate:N", title="Substrate"),
+            tooltip=["season", "site", "substrate", alt.Tooltip(f"{x}:Q", format=".3f"),
+                     alt.Tooltip(f"{y}:Q", format=".3f")],
+        )
+        .interactive()
+    )
+
+
+def shepard_plot(table):
+    """Ordination distance against observed dissimilarity, with the monotone fit.
+
+    ``table`` is sorted by dissimilarity. The step line only needs the pairs
+    where the fit changes (and the last one), and numbers are sent as 32-bit.
+    """
+    table = table.astype("float32")
+    steps = table["fitted"].ne(table["fitted"].shift())
+    steps.iloc[-1] = True
+    x = alt.X("dissimilarity:Q", title="Observed dissimilarity")
+    points = alt.Chart(table[["dissimilarity", "distance"]], title="Shepard diagram").mark_circle(
+        size=15, opacity=0.4, color="#1f77b4"
+    ).encode(x=x, y=alt.Y("distance:Q", title="Ordination distance"))
+    fit = alt.Chart(table.loc[steps, ["dissimilarity", "fitted"]]).mark_line(
+        color="#d62728", interpolate="step-after"
+    ).encode(x=x, y="fitted:Q")
+    return points + fit
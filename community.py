@@ -0,0 +1,194 @@
+"""Community-level statistics on the macroinvertebrate counts.
+
+PERMANOVA follows Anderson (2001) with sequential (type I) sums of squares,
+as in ``vegan::adonis``: the shared Bray-Curtis matrix (see ``distances``)
+is Gower-centred once, and each permutation only re-indexes that matrix.
+Permutations are evaluated in vectorized, independently seeded batches (see
+``parallel``).
+
+SIMPER (Clarke 1993) splits the average between-group Bray-Curtis
+dissimilarity into per-taxon contributions; all between-group sample pairs
+are evaluated as one broadcasted array operation (chunked to bound memory).
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import dataset_version
+from distances import community_distances, community_samples
+from parallel import batch_sizes, run_batches
+
+PERMUTATION_CHOICES = (999, 9999)
+DEFAULT_SEED = 2025
+BATCH_SIZE = 500
+
+# Term label -> factor columns of the sample table
+PERMANOVA_TERMS = {
+    "Substrate": ["substrate"],
+    "Season": ["season"],
+    "Substrate × Season": ["substrate", "season"],
+}
+
+
+def _dummies(samples, columns):
+    """Treatment-coded columns for a main effect or an interaction."""
+    if len(columns) == 1:
+        return pd.get_dummies(samples[columns[0]], drop_first=True, dtype=float).to_numpy()
+    left = _dummies(samples, columns[:1])
+    right = _dummies(samples, columns[1:])
+    return (left[:, :, None] * right[:, None, :]).reshape(len(samples), -1)
+
+
+def _hat(design):
+    return design @ np.linalg.pinv(design)
+
+
+def _sequential_projections(samples, terms):
+    """Projection matrices for each sequential term, the residual, and term dfs."""
+    n = len(samples)
+    design = np.ones((n, 1))
+    previous = _hat(design)
+    projections, dfs = [], []
+    for columns in terms.values():
+        design = np.hstack([design, _dummies(samples, columns)])
+        current = _hat(design)
+        projections.append(current - previous)
+        dfs.append(round(np.trace(current - previous)))
+        previous = current
+    residual = np.eye(n) - previous
+    return np.stack(projections), residual, dfs, n - round(np.trace(previous))
+
+
+def _gower_centre(distances):
+    a = -0.5 * np.square(distances)
+    return a - a.mean(axis=0) - a.mean(axis=1)[:, None] + a.mean()
+
+
+def _pseudo_f(projections, residual, gower, dfs, df_res):
+    """Pseudo-F of every term for a stack of (permuted) centred matrices."""
+    ss = np.einsum("kij,bij->bk", projections, gower)
+    ss_res = np.einsum("ij,bij->b", residual, gower)
+    return (ss / np.asarray(dfs)) / (ss_res / df_res)[:, None]
+
+
+def _permutation_batch(args):
+    """Count permuted pseudo-F values >= the observed ones for one batch."""
+    gower, projections, residual, dfs, df_res, observed, size, seed = args
+    rng = np.random.default_rng(seed)
+    n = gower.shape[0]
+    order = rng.permuted(np.tile(np.arange(n), (size, 1)), axis=1)
+    permuted = gower[order[:, :, None], order[:, None, :]]
+    f = _pseudo_f(projections, residual, permuted, dfs, df_res)
+    return (f >= observed - 1e-12).sum(axis=0)
+
+
+def permanova(samples, distances, terms=PERMANOVA_TERMS, permutations=999,
+              seed=DEFAULT_SEED, workers=None):
+    """Sequential PERMANOVA table for ``terms`` on a square distance matrix."""
+    gower = _gower_centre(np.asarray(distances, dtype=float))
+    projections, residual, dfs, df_res = _sequential_projections(samples, terms)
+
+    ss = np.einsum("kij,ij->k", projections, gower)
+    ss_res = float(np.einsum("ij,ij->", residual, gower))
+    observed = (ss / np.asarray(dfs)) / (ss_res / df_res)
+
+    sizes = batch_sizes(permutations, BATCH_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [
+        (gower, projections, residual, dfs, df_res, observed, size, child)
+        for size, child in zip(sizes, seeds)
+    ]
+
+    exceed = sum(run_batches(_permutation_batch, jobs, workers))
+
+    ss_total = float(ss.sum()) + ss_res
+    table = pd.DataFrame({
+        "df": dfs + [df_res, sum(dfs) + df_res],
+        "Sum of Squares": list(ss) + [ss_res, ss_total],
+        "R²": list(ss / ss_total) + [ss_res / ss_total, 1.0],
+        "F": list(observed) + [np.nan, np.nan],
+        "p": list((exceed + 1) / (permutations + 1)) + [np.nan, np.nan],
+    }, index=list(terms) + ["Residual", "Total"])
+    table.index.name = "Term"
+    return table
+
+
+@st.cache_data(show_spinner="Running PERMANOVA permutations...")
+def _community_permanova(version, permutations, seed):
+    samples, distances = community_distances("braycurtis", square=True)
+    return permanova(samples, distances, permutations=permutations, seed=seed)
+
+
+def community_permanova(permutations=999, seed=DEFAULT_SEED):
+    """Substrate, Season and Substrate x Season PERMANOVA on Bray-Curtis.
+
+    Cached per dataset version, permutation count and seed.
+    """
+    return _community_permanova(dataset_version("macro"), permutations, seed)
+
+
+# Comparison label -> (factor column, first group, second group)
+SIMPER_COMPARISONS = {
+    "Plastic vs Natural": ("substrate", "Plastic", "Natural"),
+    "S1 vs S2": ("season", "S1", "S2"),
+}
+
+SIMPER_CHUNK = 4_000_000  # max pair x taxon cells evaluated at once
+
+
+def simper(counts_a, counts_b, taxa):
+    """Per-taxon contribution to the mean Bray-Curtis dissimilarity of A vs B.
+
+    Returns a table sorted by decreasing contribution with the average
+    dissimilarity contributed by each taxon, its SD over pairs, the
+    contribution/SD ratio, the contribution and cumulative percentages, and
+    the mean abundance of the taxon in each group.
+    """
+    a = np.asarray(counts_a, dtype=float)
+    b = np.asarray(counts_b, dtype=float)
+    b_totals = b.sum(axis=1)
+    rows = max(1, SIMPER_CHUNK // max(1, b.size))
+
+    total = np.zeros(a.shape[1])
+    total_sq = np.zeros(a.shape[1])
+    for start in range(0, len(a), rows):
+        chunk = a[start:start + rows]
+        # pairs x taxa contributions: |a_ik - b_jk| / sum_k (a_ik + b_jk)
+        denom = chunk.sum(axis=1)[:, None] + b_totals[None, :]
+        contrib = np.abs(chunk[:, None, :] - b[None, :, :]) / denom[:, :, None]
+        total += contrib.sum(axis=(0, 1))
+        total_sq += np.square(contrib).sum(axis=(0, 1))
+
+    pairs = len(a) * len(b)
+    average = total / pairs
+    sd = np.sqrt(np.maximum(total_sq / pairs - np.square(average), 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(sd > 0, average / sd, np.nan)
+
+    table = pd.DataFrame({
+        "Taxon": taxa,
+        "Av. dissim": average * 100,
+        "SD": sd * 100,
+        "Dissim/SD": ratio,
+        "Contrib. %": average / average.sum() * 100,
+        "Mean A": a.mean(axis=0),
+        "Mean B": b.mean(axis=0),
+    })
+    table = table[average > 0].sort_values("Av. dissim", ascending=False)
+    table.insert(5, "Cumulative %", table["Contrib. %"].cumsum())
+    return table.reset_index(drop=True)
+
+
+@st.cache_data(show_spinner=False)
+def _community_simper(version, comparison):
+    factor, first, second = SIMPER_COMPARISONS[comparison]
+    samples, counts, taxa = community_samples()
+    groups = samples[factor].to_numpy()
+    table = simper(counts[groups == first], counts[groups == second], taxa)
+    return table.rename(columns={"Mean A": f"Mean {first}", "Mean B": f"Mean {second}"})
+
+
+def community_simper(comparison="Plastic vs Natural"):
+    """SIMPER table for one of ``SIMPER_COMPARISONS``, cached per dataset version."""
+    return _community_simper(dataset_version("macro"), comparison)
@@ -0,0 +1,404 @@
+"""Cached access to the Excel datasets shown on the Results page.
+
+Each workbook is parsed with openpyxl at most once per file version: the
+parsed sheet is written to a Parquet sidecar in ``.cache/`` (named after the
+file's content hash) and the resulting frames and raw bytes are held in a
+process-wide Streamlit resource cache shared by every session.
+
+Seasons ingested after the study (see ``ingest``) are appended to the
+macroinvertebrate and water data from the season store, and are part of the
+dataset version.
+
+The tidy tables are cached in compact form: labels are categoricals, water
+parameters float32, and the mostly-zero taxon count matrix is kept as a
+sparse matrix in the smallest integer type that holds the counts, next to
+one shared read-only dense view of it. The raw sheets are only parse inputs
+and are not cached as such; the copies kept for display hold their
+repetitive text columns as categoricals.
+``memory_footprint()`` (or ``python data_store.py``) reports the resident
+size of every cached table.
+"""
+
+import hashlib
+import os
+from itertools import pairwise
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import season_store
+from file_cache import CACHE_DIR, fingerprint
+from metrics import cache_miss, cached_call, record_cache, register_gauge, timed
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Dataset key -> workbook file name
+DATASETS = {
+    "macro": "Macroinvertebrates_Season1_2.xlsx",
+    "water": "Water_Parameters_Season1_2.xlsx",
+    "diversity": "Diversity_Indices.xlsx",
+}
+
+
+def dataset_path(name):
+    """Return the workbook path registered for a dataset key."""
+    return DATASETS[name]
+
+
+def dataset_version(name):
+    """Short content hash identifying the current version of a dataset.
+
+    It covers the workbook and every ingested season of the dataset.
+    """
+    digest = fingerprint(dataset_path(name))
+    stored = season_store.partitions(name)
+    if not stored:
+        return digest[:16]
+    return hashlib.sha256(repr((digest, stored)).encode()).hexdigest()[:16]
+
+
+def seasons(name):
+    """Season labels present in the macroinvertebrate or water data, in order."""
+    data = _community(pooled=False)[0] if name == "macro" else load_water()
+    return sorted(data["season"].unique(), key=season_store.season_number)
+
+
+def season_versions(name):
+    """{season: version} where a version only changes with that season's data.
+
+    Study seasons carry the workbook hash, ingested seasons their own.
+    """
+    base = fingerprint(dataset_path(name))[:16]
+    stored = dict(season_store.partitions(name))
+    return {season: stored.get(season, base) for season in seasons(name)}
+
+
+def season_pairs(name):
+    """Consecutive season pairs, ``(("S1", "S2"), ("S2", "S3"), ...)``."""
+    labels = seasons(name)
+    return tuple(pairwise(labels))
+
+
+def _sidecar_path(path, digest):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{digest[:16]}.parquet")
+
+
+def _apply_schema(df, schema):
+    """Cast the columns named in ``schema`` to their declared dtypes."""
+    return df.astype({column: dtype for column, dtype in schema.items() if column in df.columns})
+
+
+def _compact_counts(counts):
+    """Sparse (CSR) copy of a count matrix in the smallest signed int type that fits."""
+    from scipy import sparse
+
+    dtype = np.min_scalar_type(-max(int(counts.max(initial=0)), 1))
+    return sparse.csr_array(counts.astype(dtype))
+
+
+def _arrow_safe(df):
+    """Cast mixed-type object columns (header text above numbers) to strings."""
+    df = df.copy()
+    for col in df.select_dtypes(include="object").columns:
+        kinds = df[col].dropna().map(type).unique()
+        if len(kinds) > 1:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def _compact_sheet(df):
+    """Text columns with repeated values (sheet labels, counts typed as text) as categoricals."""
+    text = df.select_dtypes(include=["object", "string"]).columns
+    return df.astype({col: "category" for col in text if df[col].nunique() <= len(df) // 2})
+
+
+def _read_sheet(path, digest):
+    """Parse the first sheet of a workbook, through its Parquet sidecar."""
+    sidecar = _sidecar_path(path, digest)
+    if os.path.exists(sidecar):
+        try:
+            with timed("parquet_read"):
+                df = pd.read_parquet(sidecar)
+            record_cache("parquet_sidecar", True)
+            return df
+        except Exception:
+            pass  # Corrupt or partial sidecar; rebuild it below
+
+    record_cache("parquet_sidecar", False)
+    with timed("excel_parse"):
+        df = _arrow_safe(pd.read_excel(path))
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{sidecar}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass  # Read-only deployments still get the in-memory caches
+    return df
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+@cache_miss("dataset_load")
+def _load_frame(path, digest):
+    return _compact_sheet(_read_sheet(path, digest))
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _load_bytes(path, digest):
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+@cached_call("dataset_load")
+def load_frame(name):
+    """Return the parsed first sheet of a dataset (shared; treat as read-only)."""
+    path = dataset_path(name)
+    return _load_frame(path, fingerprint(path))
+
+
+def load_bytes(name):
+    """Return the raw workbook bytes of a dataset for download buttons."""
+    path = dataset_path(name)
+    return _load_bytes(path, fingerprint(path))
+
+
+# Declared dtypes of the cached community samples (every label is a categorical)
+COMMUNITY_SCHEMA = {
+    "season": "category",
+    "substrate": "category",
+    "site": "category",
+    "substrate_class": "category",
+}
+
+# Raw substrate label (lower-cased, as typed in the workbook) -> substrate class
+SUBSTRATE_CLASSES = {
+    "bottles": "Plastic",
+    "plastics": "Plastic",
+    "food wra": "Plastic",
+    "food wrappers": "Plastic",
+    "plants": "Natural",
+    "rocks": "Natural",
+}
+
+
+def _parse_community(df):
+    """Split the wide macroinvertebrate sheet into sample metadata and counts.
+
+    The sheet has one column per (season, substrate, site) sample: the header
+    row carries the season, the first two data rows the substrate and site,
+    and an empty column separates the season blocks. Season header cells are
+    inconsistently typed in the workbook, so seasons are numbered from the
+    block position instead.
+    """
+    substrate = df.iloc[0, 1:].astype("string").str.strip()
+    site = df.iloc[1, 1:].astype("string").str.strip()
+    blank = substrate.isna().to_numpy()
+    season = "S" + pd.Series((blank.cumsum() + 1).astype(str), index=substrate.index)
+
+    samples = pd.DataFrame({
+        "season": season,
+        "substrate": substrate,
+        "site": site,
+    })[~blank].reset_index(drop=True)
+    samples["substrate_class"] = samples["substrate"].str.lower().map(SUBSTRATE_CLASSES)
+
+    taxa = df.iloc[2:, 0].astype("string").str.strip()
+    counts = df.iloc[2:, 1:].loc[:, ~blank].apply(pd.to_numeric, errors="coerce")
+    counts = counts.fillna(0).to_numpy(dtype="int64").T
+    return samples, counts, taxa.tolist()
+
+
+def _append_seasons(samples, counts, taxa, frames):
+    """Add long-form season partitions as new sample rows (and new taxa)."""
+    long = pd.concat(frames, ignore_index=True)
+    known = set(taxa)
+    taxa = taxa + [t for t in pd.unique(long["taxon"]) if t not in known]
+
+    keys = ["season", "substrate", "site"]
+    extra = long[keys].drop_duplicates().reset_index(drop=True)
+    rows = pd.MultiIndex.from_frame(extra).get_indexer(pd.MultiIndex.from_frame(long[keys]))
+    cols = pd.Index(taxa).get_indexer(long["taxon"])
+    extra_counts = np.zeros((len(extra), len(taxa)), dtype="int64")
+    np.add.at(extra_counts, (rows, cols), long["count"].to_numpy())
+    extra["substrate_class"] = extra["substrate"].str.lower().map(SUBSTRATE_CLASSES)
+
+    counts = np.pad(counts, ((0, 0), (0, len(taxa) - counts.shape[1])))
+    samples = pd.concat([samples, extra.astype(samples.dtypes.to_dict())], ignore_index=True)
+    return samples, np.vstack([counts, extra_counts]), taxa
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+@cache_miss("community_load")
+def _load_community(path, digest, stored, pooled):
+    samples, counts, taxa = _parse_community(_read_sheet(path, digest))
+    if stored:
+        frames = [season_store.read_partition("macro", season, version) for season, version in stored]
+        samples, counts, taxa = _append_seasons(samples, counts, taxa, frames)
+    if pooled:
+        keys = ["season", "site", "substrate_class"]
+        codes = samples.groupby(keys, sort=False).ngroup().to_numpy()
+        pooled_counts = np.zeros((codes.max() + 1, counts.shape[1]), dtype=counts.dtype)
+        np.add.at(pooled_counts, codes, counts)
+        samples = samples.drop_duplicates(keys)[keys].reset_index(drop=True)
+        samples = samples.rename(columns={"substrate_class": "substrate"})
+        counts = pooled_counts
+    return _apply_schema(samples, COMMUNITY_SCHEMA), _compact_counts(counts), taxa
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _dense_community(path, digest, stored, pooled):
+    samples, counts, taxa = _load_community(path, digest, stored, pooled)
+    dense = counts.toarray()
+    dense.setflags(write=False)
+    return samples, dense, taxa
+
+
+def _community_key(pooled):
+    path = dataset_path("macro")
+    return path, fingerprint(path), season_store.partitions("macro"), pooled
+
+
+def _community(pooled):
+    return _load_community(*_community_key(pooled))
+
+
+def load_community_sparse(pooled=True):
+    """Like ``load_community``, but ``counts`` is the shared sparse (CSR) matrix."""
+    return _community(pooled)
+
+
+@cached_call("community_load")
+def load_community(pooled=True):
+    """Return ``(samples, counts, taxa)`` for the macroinvertebrate dataset.
+
+    ``counts`` is a read-only samples x taxa integer matrix aligned with the
+    rows of ``samples``. With ``pooled=True`` (the unit used in the study)
+    the individual substrates are pooled per season, site and substrate class
+    (Plastic / Natural); otherwise every sampled substrate is its own row.
+    Ingested seasons follow the study seasons. The dense matrix is built
+    from the cached sparse counts once per dataset version and shared.
+    """
+    return _dense_community(*_community_key(pooled))
+
+
+# Water-parameter column as typed in the workbook -> short variable name
+WATER_VARIABLES = {
+    "Temp (˚C)": "Temp",
+    "pH": "pH",
+    "TDS (ppm)": "TDS",
+    "ORP": "ORP",
+    "℅ DO": "%DO",
+    "DO": "DO",
+    "EC": "EC",
+    "NaCl": "NaCl",
+    "Res": "Res",
+    "Phosphorus (P)": "Phosphorus",
+    "Phosphorus Pentoxide(P205)": "P Pentoxide",
+    "Phosphate (PO43-)": "Phosphate",
+}
+
+# Declared dtypes of the cached water table
+WATER_SCHEMA = {
+    "season": "category",
+    "site": "category",
+    **{name: "float32" for name in WATER_VARIABLES.values()},
+}
+
+# Variables analysed in the study (DO, NaCl and Res were not reported)
+STUDY_VARIABLES = ["Temp", "pH", "TDS", "ORP", "%DO", "EC", "Phosphorus", "P Pentoxide", "Phosphate"]
+
+
+def _parse_water(df):
+    """Tidy the water-parameter sheet into one row per (season, site).
+
+    Season blocks start with a "Season N" row in the Site column; site rows
+    are the ones with a site number in the first column, so the "Average"
+    rows and blank spacer rows are skipped.
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    site = df["Site"].astype("string").str.strip()
+    season = site.str.extract(r"^Season\s*(\d+)", expand=False)
+    season = ("S" + season).ffill()
+
+    number = pd.to_numeric(df.iloc[:, 0], errors="coerce")
+    rows = number.notna() & season.notna()
+
+    water = pd.DataFrame({"season": season[rows], "site": site[rows]})
+    for column, name in WATER_VARIABLES.items():
+        water[name] = pd.to_numeric(df.loc[rows, column], errors="coerce")
+    return water.reset_index(drop=True)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+@cache_miss("water_load")
+def _load_water(path, digest, stored):
+    water = _parse_water(_read_sheet(path, digest))
+    if stored:
+        frames = [season_store.read_partition("water", season, version) for season, version in stored]
+        water = pd.concat([water, *frames], ignore_index=True)
+    return _apply_schema(water, WATER_SCHEMA)
+
+
+@cached_call("water_load")
+def load_water():
+    """Water parameters with one row per season and site (shared; read-only)."""
+    path = dataset_path("water")
+    return _load_water(path, fingerprint(path), season_store.partitions("water"))
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _plain_bytes(df):
+    """Size of ``df`` with object labels and 64-bit numbers (the read_excel dtypes)."""
+    plain = df.astype({
+        column: object if isinstance(dtype, pd.CategoricalDtype) else
+        ("float64" if dtype.kind == "f" else "int64")
+        for column, dtype in df.dtypes.items() if dtype.kind in "fiu" or dtype == "category"
+    })
+    return _frame_bytes(plain)
+
+
+def memory_footprint():
+    """Resident size of every cached table: one row per dataset component.
+
+    ``bytes`` is the compact size held in the cache, ``plain bytes`` the size
+    with the default dtypes (text sheets, and a dense int64 count matrix).
+    """
+    rows = []
+    for name in DATASETS:
+        frame = load_frame(name)
+        plain = frame.astype({col: "string" for col, dtype in frame.dtypes.items() if dtype == "category"})
+        rows.append((name, "sheet", *frame.shape, _frame_bytes(frame), _frame_bytes(plain)))
+    for pooled in (False, True):
+        samples, counts, _ = _community(pooled)
+        dense = load_community(pooled)[1]
+        label = "pooled" if pooled else "samples"
+        plain = counts.shape[0] * counts.shape[1] * 8
+        rows.append(("macro", label, *samples.shape, _frame_bytes(samples), _plain_bytes(samples)))
+        stored = counts.data.nbytes + counts.indices.nbytes + counts.indptr.nbytes
+        rows.append(("macro", f"{label} counts", *counts.shape, stored, plain))
+        # A plain layout has one dense matrix only, counted on the row above
+        rows.append(("macro", f"{label} dense counts", *dense.shape, dense.nbytes, 0))
+    water = load_water()
+    rows.append(("water", "tidy", *water.shape, _frame_bytes(water), _plain_bytes(water)))
+    return pd.DataFrame(rows, columns=["dataset", "component", "rows", "columns", "bytes", "plain bytes"])
+
+
+def _footprint_gauge():
+    return {
+        (("dataset", row.dataset), ("component", row.component)): row.bytes
+        for row in memory_footprint().itertuples()
+    }
+
+
+register_gauge("app_dataset_bytes", "Resident bytes of the cached dataset tables.", _footprint_gauge)
+
+
+if __name__ == "__main__":
+    report = memory_footprint()
+    print(report.to_string(index=False))
+    print(f"total {report['bytes'].sum() / 1024:.1f} KiB (plain dtypes {report['plain bytes'].sum() / 1024:.1f} KiB)")
@@ -0,0 +1,84 @@
+"""Dissimilarity matrices between the macroinvertebrate samples.
+
+Bray-Curtis, Jaccard (presence/absence) and Euclidean dissimilarities are
+computed together in one vectorized pass over all sample pairs (chunked to
+bound memory), in the condensed form of ``scipy.spatial.distance.pdist``.
+The matrices are cached per dataset version as one shared read-only
+resource, so PERMANOVA, NMDS and any other community statistic reuse them
+instead of recomputing them per analysis.
+"""
+
+import numpy as np
+import streamlit as st
+
+from data_store import dataset_version, load_community
+
+# Metric key -> label
+DISTANCE_METRICS = {
+    "braycurtis": "Bray–Curtis",
+    "jaccard": "Jaccard",
+    "euclidean": "Euclidean",
+}
+
+PAIR_CHUNK = 4_000_000  # max pair x taxon cells evaluated at once
+
+
+def distance_matrices(counts):
+    """Condensed Bray-Curtis, Jaccard and Euclidean matrices between the rows of ``counts``.
+
+    Jaccard uses presence/absence. Rows must not be empty: Bray-Curtis and
+    Jaccard are undefined between two empty samples.
+    """
+    x = np.asarray(counts, dtype=float)
+    totals = x.sum(axis=1)
+    present = x > 0
+    richness = present.sum(axis=1)
+    first, second = np.triu_indices(len(x), k=1)
+    matrices = {metric: np.empty(len(first)) for metric in DISTANCE_METRICS}
+
+    pairs = max(1, PAIR_CHUNK // max(1, x.shape[1]))
+    for start in range(0, len(first), pairs):
+        a, b = first[start:start + pairs], second[start:start + pairs]
+        diff = x[a] - x[b]
+        shared = (present[a] & present[b]).sum(axis=1)
+        chunk = slice(start, start + len(a))
+        matrices["braycurtis"][chunk] = np.abs(diff).sum(axis=1) / (totals[a] + totals[b])
+        matrices["jaccard"][chunk] = 1 - shared / (richness[a] + richness[b] - shared)
+        matrices["euclidean"][chunk] = np.sqrt(np.square(diff).sum(axis=1))
+    return matrices
+
+
+@st.cache_data(show_spinner=False)
+def _community_samples(version):
+    samples, counts, taxa = load_community()
+    occupied = counts.sum(axis=1) > 0
+    return samples[occupied].reset_index(drop=True), counts[occupied], taxa
+
+
+def community_samples():
+    """``(samples, counts, taxa)`` of the non-empty samples of the current dataset."""
+    return _community_samples(dataset_version("macro"))
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _community_matrices(version):
+    _, counts, _ = _community_samples(version)
+    matrices = distance_matrices(counts)
+    for matrix in matrices.values():
+        matrix.setflags(write=False)
+    return matrices
+
+
+def community_distances(metric="braycurtis", square=False):
+    """Non-empty samples and their ``metric`` dissimilarities for the current dataset.
+
+    The matrix is condensed (as from ``pdist``) and shared between sessions;
+    ``square=True`` returns a square copy. Empty samples are dropped because
+    their dissimilarity is undefined.
+    """
+    from scipy.spatial.distance import squareform
+
+    version = dataset_version("macro")
+    samples, _, _ = _community_samples(version)
+    matrix = _community_matrices(version)[metric]
+    return samples, squareform(matrix) if square else matrix
@@ -0,0 +1,131 @@
+"""Diversity indices computed from the macroinvertebrate count matrix.
+
+All indices are evaluated for every sample at once on the samples x taxa
+matrix; nothing loops over samples in Python. Per-sample indices and the
+season comparisons are cached per season version, so an ingested season
+only computes its own samples and the comparisons it takes part in.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import dataset_version, load_community, season_versions
+from stats_tests import paired_tests
+
+# Index column -> label used in charts and tables
+INDICES = {
+    "abundance": "Abundance",
+    "richness": "Species richness",
+    "evenness": "Evenness",
+    "simpson": "Simpson diversity",
+    "shannon": "Shannon",
+}
+
+
+def diversity_indices(counts):
+    """Return abundance, richness, Shannon H', Simpson 1-D and Pielou J per row.
+
+    Indices that are undefined for a sample (empty samples, or evenness with
+    fewer than two taxa) are NaN.
+    """
+    counts = np.asarray(counts, dtype=float)
+    abundance = counts.sum(axis=1)
+    richness = (counts > 0).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = counts / abundance[:, None]
+        shannon = -np.where(p > 0, p * np.log(p), 0.0).sum(axis=1)
+        simpson = 1.0 - np.square(p).sum(axis=1)
+        evenness = np.where(richness > 1, shannon / np.log(richness), np.nan)
+
+    empty = abundance == 0
+    shannon[empty] = np.nan
+    simpson[empty] = np.nan
+
+    return pd.DataFrame({
+        "abundance": abundance.astype("int64"),
+        "richness": richness,
+        "shannon": shannon,
+        "simpson": simpson,
+        "evenness": evenness,
+    })
+
+
+@st.cache_data(show_spinner=False)
+def _season_indices(season, version):
+    samples, counts, _ = load_community()
+    rows = (samples["season"] == season).to_numpy()
+    return pd.concat([samples[rows].reset_index(drop=True), diversity_indices(counts[rows])], axis=1)
+
+
+def _indices_of(versions):
+    return pd.concat([_season_indices(season, version) for season, version in versions.items()],
+                     ignore_index=True)
+
+
+def sample_indices():
+    """Per-sample metadata and diversity indices for the current dataset."""
+    return _indices_of(season_versions("macro"))
+
+
+@st.cache_data(show_spinner=False)
+def _abundance_totals(version):
+    samples, counts, _ = load_community()
+    totals = pd.Series(counts.sum(axis=1), index=samples.index)
+    by = [samples["season"], samples["substrate"]]
+    return totals.groupby(by, observed=True).sum().unstack("substrate", fill_value=0)
+
+
+def abundance_totals():
+    """Individuals collected per season (rows) and substrate class (columns)."""
+    return _abundance_totals(dataset_version("macro"))
+
+
+@st.cache_data(show_spinner=False)
+def _group_summary(version, by):
+    df = sample_indices()
+    summary = df.groupby(list(by), observed=True)[list(INDICES)].agg(["mean", "std"])
+    return summary.rename(columns=INDICES, level=0)
+
+
+def group_summary(by=("season", "substrate")):
+    """Mean and standard deviation of every index per group."""
+    return _group_summary(dataset_version("macro"), tuple(by))
+
+
+def _paired(df, factor, pair_on):
+    """Paired tests of every index between the two levels of ``factor``."""
+    levels = sorted(df[factor].unique())
+    if len(levels) != 2:
+        return {}
+    wide = df.pivot_table(index=list(pair_on), columns=factor, values=list(INDICES), dropna=False)
+    first = wide.xs(levels[0], axis=1, level=factor)[list(INDICES)]
+    second = wide.xs(levels[1], axis=1, level=factor)[list(INDICES)]
+    results = paired_tests(first, second)
+    return {index: row[["test", "statistic", "p"]].to_dict() for index, row in results.iterrows()}
+
+
+@st.cache_data(show_spinner=False)
+def _index_significance(versions):
+    df = _indices_of(dict(versions))
+    by_substrate = _paired(df, "substrate", ("season", "site"))
+    by_season = _paired(df, "season", ("substrate", "site"))
+    rows = []
+    for index, label in INDICES.items():
+        rows.append({
+            "index": label,
+            "substrate": by_substrate.get(index),
+            "season": by_season.get(index),
+        })
+    return rows
+
+
+def index_significance(seasons=("S1", "S2")):
+    """Table 2 rows: paired tests of each index between substrates and seasons.
+
+    Only the two ``seasons`` are used; samples are paired by site (and season
+    or substrate respectively). Cached per version of those two seasons.
+    """
+    versions = season_versions("macro")
+    return _index_significance(tuple((season, versions[season]) for season in seasons))
@@ -0,0 +1,190 @@
+"""Study documents (PDFs) offered in the sidebar and viewer pages.
+
+Document bytes are only read when a user actually downloads a document, and
+are then kept in a small process-wide cache shared by every session.
+
+The in-app viewer rasterizes pages with MuPDF on a shared thread pool and
+stores the images on disk under ``.cache/pages``, keyed by the file hash,
+page and DPI, so every page is rendered once per file version. Pages are
+rendered when first shown and the neighbouring pages are prefetched in the
+background.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import streamlit as st
+
+from file_cache import CACHE_DIR, fingerprint
+from metrics import cache_miss, cached_call, record_cache, timed
+
+PDF_MIME = "application/pdf"
+
+# Document key -> (file name, download label)
+DOCUMENTS = {
+    "presentation": ("Report_Presentation.pdf", "📊 Download Report Presentation (PDF)"),
+    "study": ("Research_study.pdf", "📘 Download Research Study (PDF)"),
+    "ethics": ("Ethical_clearance.pdf", "📄 Download Ethical Clearance (PDF)"),
+}
+
+# Documents offered as downloads in the sidebar
+SIDEBAR_DOCUMENTS = ["presentation", "study"]
+
+PAGE_CACHE_DIR = os.path.join(CACHE_DIR, "pages")
+DPI_CHOICES = (72, 110, 150, 200)
+DEFAULT_DPI = 110
+PAGE_FORMAT = "webp"
+RENDER_WORKERS = 4
+PREFETCH = 1  # pages rendered ahead of and behind the visible window
+
+# Page image path -> in-flight render future, so a page is rendered only once
+_in_flight = {}
+_in_flight_lock = threading.RLock()  # done callbacks may run while it is held
+
+
+@st.cache_resource(max_entries=len(DOCUMENTS), ttl=3600, show_spinner=False)
+@cache_miss("document_load")
+def _document_bytes(path, digest):
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def document_path(name):
+    return DOCUMENTS[name][0]
+
+
+@cached_call("document_load")
+def load_document(name):
+    """Return the bytes of a document, reading the file once per version."""
+    path = document_path(name)
+    return _document_bytes(path, fingerprint(path))
+
+
+def document_download_button(name, container=st):
+    """Download button whose data is only loaded when it is clicked."""
+    path, label = DOCUMENTS[name]
+    return container.download_button(
+        label=label,
+        data=partial(load_document, name),
+        file_name=path,
+        mime=PDF_MIME,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _render_pool():
+    return ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="pdf-render")
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _page_count(path, digest):
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def page_count(name):
+    path = document_path(name)
+    return _page_count(path, fingerprint(path))
+
+
+def _page_image_path(digest, page, dpi):
+    return os.path.join(PAGE_CACHE_DIR, f"{digest[:16]}-p{page}-{dpi}.{PAGE_FORMAT}")
+
+
+@timed("pdf_rasterize")
+def _rasterize(path, page, dpi, out):
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    # Each task opens its own document: MuPDF documents are not thread-safe
+    with fitz.open(path) as doc:
+        pix = doc.load_page(page).get_pixmap(dpi=dpi)
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+    os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+    tmp = f"{out}.{threading.get_ident()}.tmp"
+    img.save(tmp, format=PAGE_FORMAT, quality=85)
+    os.replace(tmp, out)
+    return out
+
+
+def _submit_render(path, digest, page, dpi):
+    """Return a future for the page image, starting a render if needed."""
+    out = _page_image_path(digest, page, dpi)
+    with _in_flight_lock:
+        future = _in_flight.get(out)
+        if future is None:
+            future = _render_pool().submit(_rasterize, path, page, dpi, out)
+            _in_flight[out] = future
+            future.add_done_callback(lambda _: _forget(out))
+    return future
+
+
+def _forget(out):
+    with _in_flight_lock:
+        _in_flight.pop(out, None)
+
+
+def page_image(name, page, dpi=DEFAULT_DPI):
+    """Path of the rendered image of a 0-based page, rendering it if needed."""
+    path = document_path(name)
+    digest = fingerprint(path)
+    out = _page_image_path(digest, page, dpi)
+    cached = os.path.exists(out)
+    record_cache("pdf_page", cached)
+    if cached:
+        return out
+    return _submit_render(path, digest, page, dpi).result()
+
+
+def prefetch_pages(name, pages, dpi=DEFAULT_DPI):
+    """Start background renders of the given pages that are not cached yet."""
+    path = document_path(name)
+    digest = fingerprint(path)
+    total = page_count(name)
+    for page in pages:
+        if 0 <= page < total and not os.path.exists(_page_image_path(digest, page, dpi)):
+            _submit_render(path, digest, page, dpi)
+
+
+def show_page(name, page, key=None):
+    """Make the viewer of a document open at a 0-based page on its next run."""
+    key = key or f"viewer-{name}"
+    st.session_state[f"{key}-page"] = page + 1
+
+
+@st.fragment
+@timed("pdf_viewer")
+def pdf_viewer(name, caption=None, key=None, window=3):
+    """Page-by-page viewer for a document with DPI and page controls.
+
+    The viewer is a fragment, so paging only reruns the viewer itself.
+
+    ``window`` pages are shown from the selected page on; the pages just
+    outside the window are prefetched so paging forward or back is instant.
+    """
+    key = key or f"viewer-{name}"
+    total = page_count(name)
+
+    if total > 1:
+        col1, col2 = st.columns([3, 1])
+        # No explicit value: the page may be preset through ``show_page``
+        start = col1.number_input(
+            f"Page (of {total})", min_value=1, max_value=total, key=f"{key}-page"
+        ) - 1
+        dpi = col2.selectbox("Resolution (DPI)", DPI_CHOICES,
+                             index=DPI_CHOICES.index(DEFAULT_DPI), key=f"{key}-dpi")
+    else:
+        start, dpi = 0, DEFAULT_DPI
+
+    visible = range(start, min(start + window, total))
+    # Queue every visible page first so they render in parallel
+    prefetch_pages(name, visible, dpi)
+    for page in visible:
+        label = caption if total == 1 else f"{caption or document_path(name)} — page {page + 1}"
+        st.image(page_image(name, page, dpi), caption=label, use_container_width=True)
+    prefetch_pages(name, [start - PREFETCH, *range(visible.stop, visible.stop + PREFETCH * window)], dpi)
@@ -0,0 +1,156 @@
+"""Server-side filtering, aggregation and paging of the datasets.
+
+The macroinvertebrate counts are held once per dataset version in long form
+(one row per sample and taxon present) with categorical columns. Filters are
+evaluated on the precomputed integer category codes, group-bys run on the
+server, and only the requested page of rows is handed to ``st.dataframe``.
+
+The filtered rows can be downloaded as CSV or Parquet. The export is only
+produced when the download is requested, and is written batch by batch from
+zero-copy slices of one shared Arrow table, so no filtered copy of the whole
+table is made.
+"""
+
+from functools import cached_property, partial
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import dataset_version, load_community_sparse
+
+FILTER_COLUMNS = ("season", "site", "substrate", "taxon")
+PAGE_SIZES = (25, 50, 100, 250)
+EXPORT_CHUNK = 4096  # rows per batch written by filtered exports
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+class CommunityIndex:
+    """Long-form counts with per-column category codes for fast filtering."""
+
+    def __init__(self, samples, counts, taxa):
+        # ``counts`` is sparse: its stored entries are exactly the taxa present
+        counts = counts.tocoo()
+        sample_idx, taxon_idx = counts.coords
+        frame = samples.iloc[sample_idx].reset_index(drop=True)
+        frame["taxon"] = np.asarray(taxa, dtype=object)[taxon_idx]
+        frame["count"] = counts.data
+
+        # Categories keep workbook order (NL1..NL10, S1, S2, ...) for the filters
+        for column in (*FILTER_COLUMNS, "substrate_class"):
+            order = pd.unique(frame[column]) if column != "taxon" else taxa
+            frame[column] = pd.Categorical(frame[column], categories=[c for c in order if pd.notna(c)])
+        self.frame = frame
+        self.codes = {column: frame[column].cat.codes.to_numpy() for column in FILTER_COLUMNS}
+
+    def categories(self, column):
+        return list(self.frame[column].cat.categories)
+
+    def mask(self, **selected):
+        """Boolean row mask for ``column=[values]`` filters (empty = no filter)."""
+        mask = np.ones(len(self.frame), dtype=bool)
+        for column, values in selected.items():
+            if not values:
+                continue
+            categories = self.frame[column].cat.categories
+            wanted = categories.get_indexer(list(values))
+            mask &= np.isin(self.codes[column], wanted[wanted >= 0])
+        return mask
+
+    def query(self, group_by=(), **selected):
+        """Filtered rows, or their totals per ``group_by`` columns."""
+        rows = self.frame[self.mask(**selected)]
+        if not group_by:
+            return rows
+        grouped = rows.groupby(list(group_by), observed=True)
+        return grouped.agg(
+            individuals=("count", "sum"),
+            taxa=("taxon", "nunique"),
+            records=("count", "size"),
+        ).reset_index().sort_values("individuals", ascending=False)
+
+    @cached_property
+    def table(self):
+        """The rows as an Arrow table with plain string columns, built once."""
+        import pyarrow as pa
+
+        frame = self.frame.astype({column: "string" for column in (*FILTER_COLUMNS, "substrate_class")})
+        return pa.Table.from_pandas(frame, preserve_index=False)
+
+    def export(self, fmt, group_by=(), **selected):
+        """CSV or Parquet bytes of a query (see ``EXPORT_FORMATS``)."""
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+
+        if group_by:
+            # Group totals are small; export them as computed
+            table = pa.Table.from_pandas(self.query(group_by, **selected), preserve_index=False)
+            mask = np.ones(table.num_rows, dtype=bool)
+        else:
+            table, mask = self.table, self.mask(**selected)
+
+        sink = pa.BufferOutputStream()
+        writer_type = pq.ParquetWriter if fmt == "Parquet" else pacsv.CSVWriter
+        with writer_type(sink, table.schema) as writer:
+            for start in range(0, table.num_rows, EXPORT_CHUNK):
+                chunk = table.slice(start, EXPORT_CHUNK)
+                writer.write_table(chunk.filter(pa.array(mask[start:start + EXPORT_CHUNK])))
+        return sink.getvalue().to_pybytes()
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _community_index(version):
+    return CommunityIndex(*load_community_sparse(pooled=False))
+
+
+def community_index():
+    """Shared explorer index for the current macroinvertebrate dataset."""
+    return _community_index(dataset_version("macro"))
+
+
+def page_of(df, page, page_size):
+    """Rows of the 1-based ``page`` of ``df``."""
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def paged_dataframe(df, key, page_sizes=PAGE_SIZES):
+    """Show one page of ``df`` with page controls; only that page is sent."""
+    col1, col2, col3 = st.columns([1, 1, 2])
+    page_size = col1.selectbox("Rows per page", page_sizes, key=f"{key}-size")
+    pages = max(1, -(-len(df) // page_size))
+    page = col2.number_input(f"Page (of {pages})", min_value=1, max_value=pages,
+                             value=1, key=f"{key}-page")
+    col3.caption(f"{len(df):,} rows")
+    st.dataframe(page_of(df, page, page_size), use_container_width=True, hide_index=True)
+
+
+def community_explorer(key="explorer"):
+    """Filter, group and page through the macroinvertebrate counts."""
+    index = community_index()
+    cols = st.columns(4)
+    selected = {
+        column: col.multiselect(column.capitalize(), index.categories(column), key=f"{key}-{column}")
+        for col, column in zip(cols, FILTER_COLUMNS)
+    }
+    group_by = st.multiselect(
+        "Group by", FILTER_COLUMNS, key=f"{key}-group",
+        help="Totals per group; leave empty to list individual records.",
+    )
+    paged_dataframe(index.query(group_by, **selected), key)
+
+    cols = st.columns(len(EXPORT_FORMATS))
+    for col, (fmt, (extension, mime)) in zip(cols, EXPORT_FORMATS.items()):
+        col.download_button(
+            f"Download filtered rows ({fmt})",
+            data=partial(index.export, fmt, tuple(group_by), **selected),
+            file_name=f"macroinvertebrates-filtered.{extension}",
+            mime=mime,
+            key=f"{key}-export-{extension}",
+        )
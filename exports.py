@@ -0,0 +1,106 @@
+"""Bundled download of every dataset.
+
+The bundle is a ZIP holding the original workbooks, the tidy tables the
+Results page is computed from (macroinvertebrate counts in long form, water
+parameters, per-sample diversity indices, ingested seasons included) as
+Parquet and CSV, and a ``manifest.json`` with the size and SHA-256 of every
+file and the dataset versions. It is built once per combination of dataset
+versions, kept under ``.cache/exports``, and its bytes are held in a
+process-wide cache shared by every session.
+"""
+
+import hashlib
+import io
+import json
+import os
+import zipfile
+from datetime import UTC, datetime
+
+import streamlit as st
+
+from data_store import DATASETS, dataset_version, load_bytes, load_water
+from diversity import sample_indices
+from explorer import community_index
+from file_cache import CACHE_DIR
+
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+ZIP_MIME = "application/zip"
+BUNDLE_PREFIX = "macroplastics-datasets"
+
+
+def bundle_version():
+    """Short hash of the versions of every dataset in the bundle."""
+    versions = {name: dataset_version(name) for name in DATASETS}
+    return hashlib.sha256(json.dumps(versions, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def bundle_name():
+    return f"{BUNDLE_PREFIX}-{bundle_version()}.zip"
+
+
+def tidy_tables():
+    """Table name -> tidy DataFrame included in the bundle."""
+    return {
+        "macroinvertebrates": community_index().frame,
+        "water_parameters": load_water(),
+        "diversity_indices": sample_indices(),
+    }
+
+
+def _table_files(name, df):
+    parquet = io.BytesIO()
+    df.to_parquet(parquet, index=False)
+    return {
+        f"parquet/{name}.parquet": parquet.getvalue(),
+        f"csv/{name}.csv": df.to_csv(index=False).encode(),
+    }
+
+
+def build_bundle(path):
+    """Write the dataset bundle to ``path`` (atomically)."""
+    files = {f"xlsx/{workbook}": load_bytes(name) for name, workbook in DATASETS.items()}
+    tables = tidy_tables()
+    rows = {}
+    for name, df in tables.items():
+        for file_name, data in _table_files(name, df).items():
+            files[file_name] = data
+            rows[file_name] = len(df)
+
+    manifest = {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "versions": {name: dataset_version(name) for name in DATASETS},
+        "files": [
+            {
+                "path": file_name,
+                "bytes": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+                **({"rows": rows[file_name]} if file_name in rows else {}),
+            }
+            for file_name, data in files.items()
+        ],
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for file_name, data in files.items():
+            # Parquet and workbooks are already compressed
+            method = zipfile.ZIP_DEFLATED if file_name.startswith("csv/") else zipfile.ZIP_STORED
+            zf.writestr(file_name, data, compress_type=method)
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+    os.replace(tmp, path)
+    return path
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _bundle_bytes(name):
+    path = os.path.join(EXPORT_DIR, name)
+    if not os.path.exists(path):
+        build_bundle(path)
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def dataset_bundle():
+    """Bytes of the ZIP bundle for the current dataset versions."""
+    return _bundle_bytes(bundle_name())
@@ -0,0 +1,34 @@
+"""Content fingerprints and the on-disk cache directory shared by the app.
+
+Kept free of heavy imports so that every page can use it cheaply.
+"""
+
+import hashlib
+import os
+import threading
+
+CACHE_DIR = ".cache"
+
+# (path) -> (mtime_ns, size, sha256); lets us skip re-hashing unchanged files
+_fingerprints = {}
+_fingerprint_lock = threading.Lock()
+
+
+def fingerprint(path):
+    """Return the SHA-256 of a file, re-hashing only when mtime or size change."""
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _fingerprint_lock:
+        cached = _fingerprints.get(path)
+        if cached and cached[:2] == stamp:
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    sha = digest.hexdigest()
+
+    with _fingerprint_lock:
+        _fingerprints[path] = (stamp[0], stamp[1], sha)
+    return sha
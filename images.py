@@ -0,0 +1,185 @@
+"""Width-bucketed JPEG/PNG derivatives of the figures and logos.
+
+Each source image is resized to a fixed set of widths under
+``.cache/images``, named after the source's content hash. Opaque images are
+encoded as JPEG; images with transparency as palette PNG. Those are the two
+formats ``st.image`` passes through untouched (anything else, WebP
+included, is re-encoded at quality 90 on every render), so the browser
+receives the derivative bytes as built. Pages ask for the width a figure is
+displayed at and get the smallest derivative that still covers it on a
+high-density screen; the bytes come from a process-wide cache shared by
+every session.
+
+Derivatives are built at deploy time::
+
+    python images.py            # every image the app serves
+    python images.py logo.png   # selected files
+
+and, as a fallback, on a background thread when the app starts. Requests
+do not build derivatives: until one exists the original file is served.
+"""
+
+import argparse
+import os
+import threading
+
+import streamlit as st
+
+from file_cache import CACHE_DIR, fingerprint
+from metrics import cache_miss, cached_call
+
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+WIDTH_BUCKETS = (240, 480, 720, 960, 1440)
+JPEG_QUALITY = 80
+PALETTE_COLORS = 256
+PIXEL_RATIO = 2  # display pixels per CSS pixel to cover (retina screens)
+
+# Approximate CSS width of the page content in the wide layout
+CONTENT_WIDTH = 1100
+
+# Images shown by the app (the static result figures were replaced by live charts)
+APP_IMAGES = ["profile_pic.png", "Study_Area_Map.png", "UMP_Logo.png", "NRF_Logo.png"]
+
+_build_lock = threading.Lock()
+_building = set()  # source paths with a background build in flight
+_building_lock = threading.Lock()
+
+
+def _derivative_path(path, digest, width, fmt):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(IMAGE_CACHE_DIR, f"{stem}-{digest[:16]}-{width}.{fmt}")
+
+
+def _derivative_format(img):
+    """``"png"`` for images with transparent pixels, ``"jpg"`` otherwise."""
+    if img.mode == "P" and "transparency" in img.info:
+        return "png"
+    if img.mode in ("RGBA", "LA") and img.getchannel("A").getextrema()[0] < 255:
+        return "png"
+    return "jpg"
+
+
+def _bucket_widths(source_width):
+    """Derivative widths for a source image, never upscaling it.
+
+    Widths stop at the largest bucket: ``st.image`` downsizes (and so
+    re-encodes) anything wider than its 1460 px layout width.
+    """
+    widths = [w for w in WIDTH_BUCKETS if w < source_width]
+    return widths + [source_width] if source_width <= WIDTH_BUCKETS[-1] else widths
+
+
+def build_derivatives(path):
+    """Write every width bucket of ``path``; returns {width: derivative path}."""
+    from PIL import Image
+
+    digest = fingerprint(path)
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    outputs = {}
+    with Image.open(path) as img:
+        img.load()
+        fmt = _derivative_format(img)
+        for width in _bucket_widths(img.width):
+            out = _derivative_path(path, digest, width, fmt)
+            outputs[width] = out
+            if os.path.exists(out):
+                continue
+            height = max(1, round(img.height * width / img.width))
+            resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+            tmp = f"{out}.{os.getpid()}.tmp"
+            if fmt == "png":
+                resized = resized.quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+                resized.save(tmp, format="PNG", optimize=True)
+            else:
+                resized = resized.convert("RGB")
+                resized.save(tmp, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp, out)
+    return outputs
+
+
+def build_all(paths=APP_IMAGES):
+    """Build the derivatives of ``paths`` (skipping existing ones)."""
+    for path in paths:
+        with _build_lock:
+            build_derivatives(path)
+
+
+def _build_in_background(path):
+    """Start building the derivatives of ``path`` unless a build is running."""
+    with _building_lock:
+        if path in _building:
+            return
+        _building.add(path)
+
+    def run():
+        try:
+            build_all([path])
+        finally:
+            with _building_lock:
+                _building.discard(path)
+
+    threading.Thread(target=run, name="image-build", daemon=True).start()
+
+
+@st.cache_resource(show_spinner=False)
+def start_prebuild():
+    """Build missing derivatives of the app's images once per process on a daemon thread."""
+    thread = threading.Thread(target=build_all, name="image-prebuild", daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _source_info(path, digest):
+    """Width and derivative format of the source image."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return img.width, _derivative_format(img)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+@cache_miss("image_load")
+def _derivative_bytes(out):
+    with open(out, "rb") as fh:
+        return fh.read()
+
+
+@cached_call("image_load")
+def responsive_image(path, display_width):
+    """Bytes of the smallest derivative covering ``display_width`` CSS pixels.
+
+    Until that derivative is built, the path of the original image is
+    returned and a background build is started.
+    """
+    digest = fingerprint(path)
+    source_width, fmt = _source_info(path, digest)
+    widths = _bucket_widths(source_width)
+    wanted = int(display_width * PIXEL_RATIO)
+    chosen = next((w for w in widths if w >= wanted), widths[-1])
+    out = _derivative_path(path, digest, chosen, fmt)
+    if not os.path.exists(out):
+        _build_in_background(path)
+        return path
+    return _derivative_bytes(out)
+
+
+def column_width(fraction=1.0):
+    """Approximate CSS width of a column taking ``fraction`` of the page."""
+    return CONTENT_WIDTH * fraction
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build responsive image derivatives.")
+    parser.add_argument("paths", nargs="*", help="images to process (default: the app's images)")
+    args = parser.parse_args(argv)
+
+    for path in args.paths or APP_IMAGES:
+        outputs = build_derivatives(path)
+        source = os.path.getsize(path)
+        sizes = ", ".join(f"{w}px {os.path.getsize(p) / 1024:.0f} KB" for w, p in outputs.items())
+        print(f"{path} ({source / 1024:.0f} KB): {sizes}")
+
+
+if __name__ == "__main__":
+    main()
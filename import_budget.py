@@ -0,0 +1,131 @@
+"""Cold-start import report with a regression check against a stored budget.
+
+Every stage is measured in a fresh interpreter with ``python -X importtime``:
+the "startup" stage is what ``app.py`` imports at the top (paid by every
+session and every cold start); the page stages are the extra imports a page
+pays on first use, measured after the startup imports are already loaded.
+
+Budgets are relative: every run also times a bare ``import streamlit`` in a
+fresh interpreter, and each stage is budgeted as a multiple of that
+reference, so the same budget holds on faster and slower machines.
+
+    python import_budget.py            # report and check against the budget
+    python import_budget.py --update   # store the current ratios as budget
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUDGET_FILE = os.path.join(HERE, "import_budget.json")
+MARKER = "import time: --- stage ---"
+
+# Stage -> modules it imports (mirrors the imports in app.py)
+STAGES = {
+    "startup": ["streamlit", "documents", "images", "ingest", "metrics", "pdf_search", "qr_assets"],
+    "Results": ["results"],
+    "Discussion": ["ordination"],
+    "Ethical Clearance": ["fitz", "PIL.Image"],
+    "Acknowledgments": ["qrcode"],
+}
+# Timed in every run; stage budgets are multiples of it
+REFERENCE = ["streamlit"]
+
+
+def _measure_once(stage):
+    """Return {top-level module: cumulative ms} for one stage in a fresh process."""
+    if stage is None:
+        preload, modules = [], REFERENCE
+    else:
+        preload = [] if stage == "startup" else STAGES["startup"]
+        modules = STAGES[stage]
+    code = "".join(f"import {m}\n" for m in preload)
+    # Everything before the marker (interpreter start-up, preloads) is ignored
+    code += f"import sys; sys.stderr.write({MARKER!r} + '\\n'); sys.stderr.flush()\n"
+    code += "".join(f"import {m}\n" for m in modules)
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+
+    lines = proc.stderr.splitlines()
+    lines = lines[lines.index(MARKER) + 1:]
+
+    modules = {}
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):  # nested import, already counted by its parent
+            continue
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def measure(stage, runs=3):
+    """Median per-module import time of a stage over ``runs`` fresh processes.
+
+    ``stage=None`` measures the reference import.
+    """
+    samples = [_measure_once(stage) for _ in range(runs)]
+    names = set().union(*samples)
+    return {
+        name: statistics.median(sample.get(name, 0.0) for sample in samples)
+        for name in names
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per stage")
+    parser.add_argument("--top", type=int, default=8, help="modules listed per stage")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional slowdown over the budget")
+    parser.add_argument("--update", action="store_true", help="write the budget file")
+    args = parser.parse_args(argv)
+
+    budget = {}
+    if os.path.exists(BUDGET_FILE):
+        with open(BUDGET_FILE) as fh:
+            budget = json.load(fh)
+
+    reference = round(sum(measure(None, args.runs).values()), 1)
+    print(f"reference (import {', '.join(REFERENCE)}): {reference:.1f} ms")
+    ratios, failures = {"reference_ms": reference}, []
+    for stage in STAGES:
+        modules = measure(stage, args.runs)
+        total = sum(modules.values())
+        ratios[stage] = round(total / reference, 3)
+        limit = budget.get(stage)
+        status = ""
+        if limit is not None and not args.update:
+            allowed = limit * (1 + args.tolerance)
+            status = "OK" if ratios[stage] <= allowed else "OVER BUDGET"
+            status = f"  budget {limit:.2f}x (+{args.tolerance:.0%}) {status}"
+            if ratios[stage] > allowed:
+                failures.append(stage)
+
+        print(f"{stage}: {total:.1f} ms = {ratios[stage]:.2f}x reference{status}")
+        for name, ms in sorted(modules.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"    {ms:9.1f} ms  {name}")
+
+    if args.update:
+        with open(BUDGET_FILE, "w") as fh:
+            json.dump(ratios, fh, indent=2)
+            fh.write("\n")
+        print(f"Budget written to {os.path.basename(BUDGET_FILE)}")
+        return 0
+
+    if failures:
+        print(f"Import budget exceeded for: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
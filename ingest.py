@@ -0,0 +1,226 @@
+"""Ingestion of new sampling seasons from a drop folder.
+
+Season workbooks dropped into ``incoming/`` are named after the dataset and
+season they hold, in the same layouts as the study workbooks:
+
+    Macroinvertebrates_S3.xlsx   one season block: substrate and site rows,
+                                 then one row of counts per taxon
+    Water_Parameters_S3.xlsx     a "Season 3" block of numbered site rows
+
+Each new file is validated and appended to the season store as the
+partition of its season (see ``season_store``). Analyses are cached per
+season version where they only involve some seasons, so a new season only
+computes its own indices and comparisons; the Results page picks it up on
+the next rerun. Files that fail validation are recorded with the error and
+not retried until they change.
+
+    python ingest.py            # ingest new files once
+    python ingest.py --watch    # keep polling the drop folder
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+import streamlit as st
+
+import season_store
+from file_cache import fingerprint
+
+INCOMING_DIR = os.environ.get("APP_INCOMING_DIR", "incoming")
+POLL_SECONDS = 60
+
+# Dataset key -> workbook name pattern (the group is the season label)
+FILE_PATTERNS = {
+    "macro": re.compile(r"^Macroinvertebrates_(S\d+)\.xlsx$", re.IGNORECASE),
+    "water": re.compile(r"^Water_Parameters_(S\d+)\.xlsx$", re.IGNORECASE),
+}
+
+logger = logging.getLogger(__name__)
+_ingest_lock = threading.Lock()
+
+
+class SchemaError(ValueError):
+    """A season workbook does not have the expected layout."""
+
+
+def classify(filename):
+    """``(dataset, season)`` of a season workbook name, or None."""
+    for dataset, pattern in FILE_PATTERNS.items():
+        match = pattern.match(filename)
+        if match:
+            return dataset, match.group(1).upper()
+    return None
+
+
+def validate_community(df, season):
+    """Long-form counts (season, substrate, site, taxon, count) of one season."""
+    import numpy as np
+    import pandas as pd
+
+    from data_store import _parse_community
+
+    if df.shape[0] < 3 or df.shape[1] < 2:
+        raise SchemaError("expected substrate and site rows followed by taxon rows")
+    samples, counts, taxa = _parse_community(df)
+    if samples["season"].nunique() != 1:
+        raise SchemaError("a season workbook must hold exactly one season block")
+    header = pd.Series(df.columns[1:]).astype(str).str.extract(r"^\s*Season\s*(\d+)", expand=False)
+    found = sorted({f"S{int(n)}" for n in header.dropna()}, key=season_store.season_number)
+    if not found:
+        raise SchemaError('no "Season N" header above the sample columns')
+    if found != [season]:
+        raise SchemaError(f"file name says {season} but the sheet holds {', '.join(found)}")
+
+    unknown = sorted(set(samples.loc[samples["substrate_class"].isna(), "substrate"]))
+    if unknown:
+        raise SchemaError(f"unknown substrates: {', '.join(unknown)}")
+    if samples["site"].isna().any():
+        raise SchemaError("every sample column needs a site")
+    if samples.duplicated(["substrate", "site"]).any():
+        raise SchemaError("duplicate substrate and site columns")
+    if any(pd.isna(t) or not str(t) for t in taxa) or len(set(taxa)) != len(taxa):
+        raise SchemaError("taxon names must be present and unique")
+
+    raw = df.iloc[2:, 1:].loc[:, df.iloc[0, 1:].notna().to_numpy()]
+    numeric = raw.apply(pd.to_numeric, errors="coerce")
+    if (numeric.isna() & raw.notna()).any().any():
+        raise SchemaError("counts must be numbers")
+    if (counts < 0).any() or not (numeric.fillna(0) % 1 == 0).all().all():
+        raise SchemaError("counts must be non-negative whole numbers")
+
+    sample_idx, taxon_idx = (a.ravel() for a in np.indices(counts.shape))
+    return pd.DataFrame({
+        "season": season,
+        "substrate": samples["substrate"].to_numpy()[sample_idx],
+        "site": samples["site"].to_numpy()[sample_idx],
+        "taxon": [taxa[i] for i in taxon_idx],
+        "count": counts[sample_idx, taxon_idx],
+    })
+
+
+def validate_water(df, season):
+    """Water parameters (season, site, variables) of one season."""
+    from data_store import WATER_VARIABLES, _parse_water
+
+    columns = {str(c).strip() for c in df.columns}
+    missing = [c for c in ["Site", *WATER_VARIABLES] if c not in columns]
+    if missing:
+        raise SchemaError(f"missing columns: {', '.join(missing)}")
+    water = _parse_water(df)
+    if water.empty:
+        raise SchemaError('no site rows under a "Season N" row')
+    found = sorted(water["season"].unique())
+    if found != [season]:
+        raise SchemaError(f"file name says {season} but the sheet holds {', '.join(found)}")
+    if water["site"].duplicated().any():
+        raise SchemaError("duplicate site rows")
+    if water[list(WATER_VARIABLES.values())].isna().all().any():
+        raise SchemaError("a water variable has no numeric values")
+    return water
+
+
+VALIDATORS = {"macro": validate_community, "water": validate_water}
+
+
+def ingest_file(path):
+    """Validate and store one season workbook; returns its season or None.
+
+    Raises ``SchemaError`` (after recording the rejection) for invalid files.
+    """
+    import pandas as pd
+
+    from data_store import load_community, load_water
+
+    dataset, season = classify(os.path.basename(path))
+    digest = fingerprint(path)
+    if season_store.is_known(digest):
+        return None
+
+    base = load_community(pooled=False)[0] if dataset == "macro" else load_water()
+    stored = dict(season_store.partitions(dataset))
+    try:
+        if season in set(base["season"]) and season not in stored:
+            raise SchemaError(f"{season} is part of the study workbook")
+        frame = VALIDATORS[dataset](pd.read_excel(path), season)
+    except SchemaError as e:
+        season_store.record_rejected(digest, path, e)
+        raise
+    except Exception as e:
+        # Any other failure is recorded too, or the file would be retried every poll
+        error = SchemaError(f"unreadable workbook: {e}")
+        season_store.record_rejected(digest, path, error)
+        raise error from e
+    season_store.write_partition(dataset, season, digest, frame, path)
+    return season
+
+
+def scan(folder=INCOMING_DIR):
+    """Ingest every new season workbook in ``folder``.
+
+    Returns ``(ingested, rejected)`` lists of ``(file name, detail)``.
+    """
+    ingested, rejected = [], []
+    if not os.path.isdir(folder):
+        return ingested, rejected
+    with _ingest_lock:
+        # Macroinvertebrates before water parameters, and seasons in order
+        names = sorted(
+            (name for name in os.listdir(folder) if classify(name)),
+            key=lambda name: (classify(name)[0] != "macro", season_store.season_number(classify(name)[1])),
+        )
+        for name in names:
+            try:
+                season = ingest_file(os.path.join(folder, name))
+            except SchemaError as e:
+                logger.warning("Rejected %s: %s", name, e)
+                rejected.append((name, str(e)))
+                continue
+            if season:
+                logger.info("Ingested %s as %s", name, season)
+                ingested.append((name, season))
+    return ingested, rejected
+
+
+def _watch(folder, interval):
+    while True:
+        try:
+            scan(folder)
+        except Exception:
+            logger.exception("Season ingestion failed")
+        time.sleep(interval)
+
+
+@st.cache_resource(show_spinner=False)
+def start_ingest_watch(folder=INCOMING_DIR, interval=POLL_SECONDS):
+    """Poll the drop folder on a daemon thread, once per process.
+
+    The folder is created if needed, so files dropped later are picked up.
+    """
+    os.makedirs(folder, exist_ok=True)
+    thread = threading.Thread(target=_watch, args=(folder, interval), name="season-ingest", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest new season workbooks.")
+    parser.add_argument("folder", nargs="?", default=INCOMING_DIR, help="drop folder")
+    parser.add_argument("--watch", action="store_true", help="keep polling the folder")
+    parser.add_argument("--interval", type=int, default=POLL_SECONDS, help="seconds between polls")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    while True:
+        _, rejected = scan(args.folder)
+        if not args.watch:
+            return 1 if rejected else 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
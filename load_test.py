@@ -0,0 +1,439 @@
+"""Concurrent-session load test for ``app.py`` over the Streamlit websocket.
+
+Starts the app with ``streamlit run`` on a free local port and drives N
+simulated browser sessions against it. Each session opens the websocket,
+runs the script, then keeps switching sidebar pages and clicking download
+buttons with a random think time in between, as a visitor would. Deferred
+downloads (``data=`` a callable) are requested over the websocket like the
+browser does, and the returned file URL is fetched. For every step the
+harness reports the p50/p95/p99 rerun latency (request sent to
+``script_finished`` received) and download latency, the server's CPU and
+RSS over time, and whether file descriptors were left open once every
+session disconnected. The exit status is 1 when a step has session errors
+or script exceptions, misses the p95 target, or descriptors leak.
+
+Server resources are read from ``/proc``, so the harness runs on Linux. The
+websocket client is a development dependency (``requirements-dev.txt``).
+
+    python load_test.py --sessions 10                 # one step of 10 users
+    python load_test.py --sessions 5 10 20 40         # ramp to find capacity
+    python load_test.py --sessions 20 --json out.json --p95-target 1500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+
+from file_cache import CACHE_DIR
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "app.py")
+HOST = "127.0.0.1"
+NAV_LABEL = "Navigation"
+SERVER_LOG = os.path.join(HERE, CACHE_DIR, "load_test_server.log")
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Descriptors the server may legitimately hold per idle process
+FD_LEAK_TOLERANCE = 4
+# Seconds the server keeps a closed session for reconnects. Expired sessions
+# are only dropped when the next session connects, so the descriptor check
+# opens a probe session after the settle time (see ``descriptor_report``)
+SESSION_TTL = 1
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, log):
+    """Start ``streamlit run app.py`` and wait until it answers health checks."""
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", APP,
+            "--server.headless=true",
+            f"--server.port={port}",
+            f"--server.address={HOST}",
+            "--server.fileWatcherType=none",
+            f"--server.disconnectedSessionTTL={SESSION_TTL}",
+            "--browser.gatherUsageStats=false",
+        ],
+        cwd=HERE, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://{HOST}:{port}/_stcore/health", timeout=1) as resp:
+                if resp.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("streamlit did not become healthy within 60 s")
+
+
+# --- server resources ---------------------------------------------------
+
+def _cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK  # utime + stime
+
+
+def _rss_mb(pid):
+    with open(f"/proc/{pid}/statm") as fh:
+        return int(fh.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+def open_files(pid):
+    """Targets of the server's file descriptors (files, sockets, pipes)."""
+    fd_dir = f"/proc/{pid}/fd"
+    targets = []
+    for fd in os.listdir(fd_dir):
+        try:
+            targets.append(os.readlink(os.path.join(fd_dir, fd)))
+        except OSError:  # closed while listing
+            continue
+    return targets
+
+
+class ResourceSampler:
+    """Samples the server's CPU share, RSS and descriptor count every interval."""
+
+    def __init__(self, pid, interval=1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []  # (seconds since start, cpu %, rss MB, open fds)
+
+    async def run(self):
+        start = last_wall = time.monotonic()
+        last_cpu = _cpu_seconds(self.pid)
+        while True:
+            await asyncio.sleep(self.interval)
+            wall, cpu = time.monotonic(), _cpu_seconds(self.pid)
+            self.samples.append((
+                wall - start,
+                100 * (cpu - last_cpu) / (wall - last_wall),
+                _rss_mb(self.pid),
+                len(open_files(self.pid)),
+            ))
+            last_wall, last_cpu = wall, cpu
+
+    def summary(self):
+        if len(self.samples) < 2:
+            return {}
+        times, cpu, rss, fds = zip(*self.samples)
+        # Least-squares slope of RSS over time: steady growth under load is a leak
+        mean_t, mean_rss = statistics.fmean(times), statistics.fmean(rss)
+        slope = sum((t - mean_t) * (r - mean_rss) for t, r in zip(times, rss)) / sum(
+            (t - mean_t) ** 2 for t in times
+        )
+        return {
+            "cpu_mean_pct": round(statistics.fmean(cpu), 1),
+            "cpu_max_pct": round(max(cpu), 1),
+            "rss_start_mb": round(rss[0], 1),
+            "rss_end_mb": round(rss[-1], 1),
+            "rss_peak_mb": round(max(rss), 1),
+            "rss_growth_mb_per_min": round(slope * 60, 2),
+            "fds_max": max(fds),
+        }
+
+
+# --- simulated sessions -------------------------------------------------
+
+class Session:
+    """One simulated browser tab speaking the Streamlit websocket protocol."""
+
+    def __init__(self, port, timeout):
+        self.port = port
+        self.timeout = timeout
+        self.ws = None
+        self.nav = None  # (widget id, options) of the sidebar navigation radio
+        self.downloads = []  # download button protos of the last run
+        self.widgets = {}  # widget id -> WidgetState to resend with every rerun
+        self.session_id = None  # server-side id, required by deferred downloads
+        self.exceptions = 0
+
+    async def connect(self):
+        from websockets.asyncio.client import connect
+
+        self.ws = await connect(
+            f"ws://{HOST}:{self.port}/_stcore/stream",
+            subprotocols=["streamlit"], max_size=None, open_timeout=self.timeout,
+        )
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def rerun(self, trigger=None):
+        """Request a rerun and wait for it to finish; returns its latency in ms."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.query_string = ""
+        client_state.page_script_hash = ""
+        for state in self.widgets.values():
+            client_state.widget_states.widgets.add().CopyFrom(state)
+        if trigger is not None:
+            button = client_state.widget_states.widgets.add()
+            button.id = trigger
+            button.trigger_value = True
+
+        self.downloads = []
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await asyncio.wait_for(self._until_finished(), self.timeout)
+        return (time.perf_counter() - start) * 1000
+
+    async def _receive(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = ForwardMsg.FromString(await self.ws.recv())
+        if msg.WhichOneof("type") == "new_session":
+            self.session_id = msg.new_session.initialize.session_id
+        return msg
+
+    async def _until_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        while True:
+            msg = await self._receive()
+            kind = msg.WhichOneof("type")
+            if kind == "delta":
+                self._collect(msg.delta)
+            elif kind == "script_finished":
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    def _collect(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "radio" and element.radio.label == NAV_LABEL:
+            self.nav = (element.radio.id, list(element.radio.options))
+        elif kind == "download_button":
+            self.downloads.append(element.download_button)
+        elif kind == "exception":
+            self.exceptions += 1
+
+    async def visit(self, page):
+        """Switch the sidebar navigation to ``page``."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id, _ = self.nav
+        # Radios report the formatted label of the selected option
+        state = WidgetState(id=widget_id, string_value=page)
+        self.widgets = {widget_id: state}  # page widgets start from their defaults
+        return await self.rerun()
+
+    async def deferred_url(self, file_id):
+        """Have the server generate a deferred download; returns its file URL."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        request = msg.backend_operation_request
+        request.request_id = uuid.uuid4().hex
+        request.session_id = self.session_id
+        request.deferred_file.file_id = file_id
+        await self.ws.send(msg.SerializeToString())
+
+        async def response():
+            while True:
+                reply = await self._receive()
+                if (reply.WhichOneof("type") == "backend_operation_response"
+                        and reply.backend_operation_response.request_id == request.request_id):
+                    return reply.backend_operation_response
+
+        reply = await asyncio.wait_for(response(), self.timeout)
+        if reply.error_msg:
+            raise RuntimeError(f"deferred download failed: {reply.error_msg}")
+        return reply.deferred_file.url
+
+    async def download(self, button):
+        """Click a download button and fetch its file; returns the latency in ms."""
+        start = time.perf_counter()
+        url = button.url or await self.deferred_url(button.deferred_file_id)
+        await asyncio.to_thread(_fetch, f"http://{HOST}:{self.port}{url}", self.timeout)
+        return (time.perf_counter() - start) * 1000
+
+
+def _fetch(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return len(resp.read())
+
+
+async def run_session(port, rng, deadline, think, timeout, stats):
+    session = Session(port, timeout)
+    try:
+        await session.connect()
+        stats["reruns"].append(await session.rerun())
+        if session.nav is None:
+            raise RuntimeError(f"no '{NAV_LABEL}' radio in the script output")
+        while time.monotonic() < deadline:
+            await asyncio.sleep(rng.uniform(*think))
+            if session.downloads and rng.random() < 0.3:
+                stats["downloads"].append(await session.download(rng.choice(session.downloads)))
+            else:
+                stats["reruns"].append(await session.visit(rng.choice(session.nav[1])))
+    except Exception as e:
+        stats["errors"].append(f"{type(e).__name__}: {e}")
+    finally:
+        stats["exceptions"] += session.exceptions
+        await session.close()
+
+
+async def probe_session(port, timeout):
+    """Connect, run the script once and disconnect."""
+    session = Session(port, timeout)
+    try:
+        await session.connect()
+        await session.rerun()
+    finally:
+        await session.close()
+
+
+def percentiles(values):
+    if len(values) < 2:
+        return {"p50": None, "p95": None, "p99": None}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": round(cuts[49], 1), "p95": round(cuts[94], 1), "p99": round(cuts[98], 1)}
+
+
+async def run_step(port, pid, sessions, duration, think, timeout, seed):
+    """Run ``sessions`` concurrent sessions for ``duration`` seconds."""
+    stats = {"reruns": [], "downloads": [], "errors": [], "exceptions": 0}
+    sampler = ResourceSampler(pid)
+    sampling = asyncio.ensure_future(sampler.run())
+    deadline = time.monotonic() + duration
+    # Stagger the connections over the first think interval, like arriving users
+    tasks = []
+    for i in range(sessions):
+        rng = random.Random(seed * 1000 + i)
+        tasks.append(asyncio.ensure_future(run_session(port, rng, deadline, think, timeout, stats)))
+        await asyncio.sleep(think[0] / max(sessions, 1))
+    await asyncio.gather(*tasks)
+    sampling.cancel()
+
+    return {
+        "sessions": sessions,
+        "reruns": len(stats["reruns"]),
+        "rerun_ms": percentiles(stats["reruns"]),
+        "downloads": len(stats["downloads"]),
+        "download_ms": percentiles(stats["downloads"]),
+        "errors": stats["errors"],
+        "script_exceptions": stats["exceptions"],
+        "server": sampler.summary(),
+    }
+
+
+def descriptor_report(port, pid, before, settle, timeout):
+    """Descriptors still open ``settle`` seconds after every session closed.
+
+    ``before`` is taken after one probe session, and a probe session after
+    the settle time makes the server drop the expired sessions, so both
+    counts include the descriptors of exactly one closed session.
+    """
+    time.sleep(settle)
+    asyncio.run(probe_session(port, timeout))
+    after = open_files(pid)
+    # Regular files of the app directory (PDFs, workbooks, caches) should never stay open
+    app_files = sorted({t for t in after if t.startswith(HERE + os.sep) and t != SERVER_LOG})
+    return {
+        "fds_before": len(before),
+        "fds_after": len(after),
+        "app_files_open": app_files,
+        "leak": len(after) - len(before) > FD_LEAK_TOLERANCE or bool(app_files),
+    }
+
+
+def _print_step(step, p95_target):
+    r, d, s = step["rerun_ms"], step["download_ms"], step["server"]
+    ok = (not step["errors"] and not step["script_exceptions"]
+          and r["p95"] is not None and r["p95"] <= p95_target)
+    print(f"{step['sessions']:4d} sessions  reruns {step['reruns']:5d}  "
+          f"p50 {r['p50']} / p95 {r['p95']} / p99 {r['p99']} ms  "
+          f"downloads {step['downloads']} (p95 {d['p95']} ms)  "
+          f"cpu {s.get('cpu_mean_pct')}% (max {s.get('cpu_max_pct')}%)  "
+          f"rss {s.get('rss_start_mb')} -> {s.get('rss_end_mb')} MB "
+          f"({s.get('rss_growth_mb_per_min')} MB/min)  "
+          f"errors {len(step['errors'])}  exceptions {step['script_exceptions']}  "
+          f"{'OK' if ok else 'OVER TARGET'}")
+    for error in sorted(set(step["errors"]))[:5]:
+        print(f"    {error}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10],
+                        help="concurrent sessions per step (several values ramp up)")
+    parser.add_argument("--duration", type=float, default=60, help="seconds per step")
+    parser.add_argument("--think", type=float, nargs=2, default=(0.5, 2.0),
+                        metavar=("MIN", "MAX"), help="think time between actions (s)")
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun timeout (s)")
+    parser.add_argument("--p95-target", type=float, default=2000,
+                        help="p95 rerun latency (ms) a supported step must stay under")
+    parser.add_argument("--settle", type=float, default=5,
+                        help=f"idle seconds before the descriptor check (over {SESSION_TTL} s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    os.makedirs(os.path.join(HERE, CACHE_DIR), exist_ok=True)
+    with open(SERVER_LOG, "w") as log:
+        server = start_server(port, log)
+        try:
+            # Also starts what the app sets up once per process
+            asyncio.run(probe_session(port, args.timeout))
+            before = open_files(server.pid)
+            steps, supported, failed = [], 0, []
+            for n in args.sessions:
+                step = asyncio.run(run_step(port, server.pid, n, args.duration,
+                                            tuple(args.think), args.timeout, args.seed))
+                steps.append(step)
+                if _print_step(step, args.p95_target):
+                    supported = max(supported, n)
+                else:
+                    failed.append(n)
+            descriptors = descriptor_report(port, server.pid, before, args.settle, args.timeout)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print(f"server log: {os.path.relpath(SERVER_LOG, HERE)}")
+    print(f"descriptors: {descriptors['fds_before']} before, {descriptors['fds_after']} "
+          f"after all sessions closed{'  LEAK' if descriptors['leak'] else ''}")
+    for path in descriptors["app_files_open"]:
+        print(f"    still open: {os.path.relpath(path, HERE)}")
+    print(f"Largest step within p95 {args.p95_target:g} ms and without errors: "
+          f"{supported or 'none'} sessions")
+    if failed:
+        print(f"Over target or failing: {', '.join(map(str, failed))} sessions")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"steps": steps, "descriptors": descriptors,
+                       "supported_sessions": supported, "failed_steps": failed}, fh, indent=2)
+            fh.write("\n")
+    return 1 if descriptors["leak"] or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
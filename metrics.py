@@ -0,0 +1,244 @@
+"""Section timings and cache hit/miss counters for the app.
+
+Stages are timed with ``timed`` (a context manager or decorator). Cached
+loaders are wrapped twice: ``cached_call`` on the public function times a
+lookup, and ``cache_miss`` under the cache decorator flags the lookups that
+actually ran the function. Counters are process-wide, so they cover every
+session.
+
+The numbers are exposed in two opt-in ways:
+
+* ``APP_METRICS_PORT=9464`` starts a local HTTP endpoint serving
+  Prometheus text at ``/metrics`` and JSON at ``/metrics.json``;
+* ``?debug=metrics`` in the app URL (or ``APP_DEBUG_OVERLAY=1``) shows a
+  metrics table in the sidebar.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+METRICS_PORT_ENV = "APP_METRICS_PORT"
+OVERLAY_ENV = "APP_DEBUG_OVERLAY"
+METRICS_HOST = "127.0.0.1"
+
+_stages = {}
+_gauges = {}  # name -> (help, callback)
+_lock = threading.Lock()
+# Stages whose cached function ran in this thread (caches compute in the caller)
+_missed = threading.local()
+
+
+def _stage(stage):
+    stats = _stages.get(stage)
+    if stats is None:
+        stats = _stages[stage] = {
+            "count": 0, "seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0,
+            "lookups": 0, "misses": 0,
+        }
+    return stats
+
+
+def record(stage, seconds):
+    """Add one timed call of ``seconds`` to ``stage``."""
+    with _lock:
+        stats = _stage(stage)
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["last_seconds"] = seconds
+
+
+def record_cache(stage, hit):
+    """Count one cache lookup of ``stage``."""
+    with _lock:
+        stats = _stage(stage)
+        stats["lookups"] += 1
+        stats["misses"] += not hit
+
+
+@contextmanager
+def timed(stage):
+    """Time the enclosed block (or decorated function) under ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def _missed_stages():
+    if not hasattr(_missed, "stages"):
+        _missed.stages = set()
+    return _missed.stages
+
+
+def cached_call(stage):
+    """Decorator for a cached loader: time it and count a hit or a miss."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            missed = _missed_stages()
+            missed.discard(stage)
+            try:
+                with timed(stage):
+                    return func(*args, **kwargs)
+            finally:
+                record_cache(stage, hit=stage not in missed)
+                missed.discard(stage)
+        return wrapper
+    return decorator
+
+
+def cache_miss(stage):
+    """Decorator for the function under a cache decorator: flag a miss."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            _missed_stages().add(stage)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Copy of the counters, {stage: stats}, with derived cache hits."""
+    with _lock:
+        stages = {stage: dict(stats) for stage, stats in _stages.items()}
+    for stats in stages.values():
+        stats["hits"] = stats["lookups"] - stats["misses"]
+    return stages
+
+
+def register_gauge(name, help, callback):
+    """Expose ``callback()`` as a gauge: {((label, value), ...): number}.
+
+    The callback runs on every scrape of the metrics endpoint.
+    """
+    with _lock:
+        _gauges[name] = (help, callback)
+
+
+def gauges():
+    """{name: {labels: value}} of the registered gauges; failing ones are skipped."""
+    with _lock:
+        registered = dict(_gauges)
+    values = {}
+    for name, (_, callback) in registered.items():
+        try:
+            values[name] = callback()
+        except Exception:
+            continue
+    return values
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(stages=None):
+    """Counters in the Prometheus text exposition format."""
+    stages = snapshot() if stages is None else stages
+    lines = [
+        "# HELP app_stage_seconds Time spent in instrumented app stages.",
+        "# TYPE app_stage_seconds summary",
+    ]
+    timed_stages = [(stage, stats) for stage, stats in sorted(stages.items()) if stats["count"]]
+    for stage, stats in timed_stages:
+        lines.append(f'app_stage_seconds_sum{{stage="{_label(stage)}"}} {stats["seconds"]:.6f}')
+        lines.append(f'app_stage_seconds_count{{stage="{_label(stage)}"}} {stats["count"]}')
+    lines += [
+        "# HELP app_stage_seconds_max Slowest call of each stage.",
+        "# TYPE app_stage_seconds_max gauge",
+    ]
+    for stage, stats in timed_stages:
+        lines.append(f'app_stage_seconds_max{{stage="{_label(stage)}"}} {stats["max_seconds"]:.6f}')
+    lines += [
+        "# HELP app_cache_requests_total Cache lookups of each stage by result.",
+        "# TYPE app_cache_requests_total counter",
+    ]
+    for stage, stats in sorted(stages.items()):
+        if stats["lookups"]:
+            for result in ("hit", "miss"):
+                value = stats["hits"] if result == "hit" else stats["misses"]
+                lines.append(
+                    f'app_cache_requests_total{{stage="{_label(stage)}",result="{result}"}} {value}'
+                )
+    for name, values in gauges().items():
+        lines += [f"# HELP {name} {_gauges[name][0]}", f"# TYPE {name} gauge"]
+        for labels, value in values.items():
+            label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            gauge_values = {
+                name: [{**dict(labels), "value": value} for labels, value in values.items()]
+                for name, values in gauges().items()
+            }
+            body = json.dumps({"stages": snapshot(), "gauges": gauge_values}, indent=2)
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise flood the app log
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    """Serve the metrics on ``APP_METRICS_PORT`` (once per process), if set."""
+    port = os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    server = ThreadingHTTPServer((METRICS_HOST, int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def overlay_enabled():
+    return st.query_params.get("debug") == "metrics" or os.environ.get(OVERLAY_ENV) == "1"
+
+
+def debug_overlay():
+    """Sidebar table of the stage timings and cache counters, when enabled."""
+    if not overlay_enabled():
+        return
+    rows = [
+        {
+            "stage": stage,
+            "calls": stats["count"],
+            "last ms": round(stats["last_seconds"] * 1000, 1),
+            "mean ms": round(stats["seconds"] / stats["count"] * 1000, 1) if stats["count"] else None,
+            "max ms": round(stats["max_seconds"] * 1000, 1),
+            "hits": stats["hits"] if stats["lookups"] else None,
+            "misses": stats["misses"] if stats["lookups"] else None,
+        }
+        for stage, stats in sorted(snapshot().items())
+    ]
+    with st.sidebar.expander("⏱ Metrics", expanded=True):
+        st.dataframe(rows, use_container_width=True, hide_index=True)
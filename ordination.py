@@ -0,0 +1,202 @@
+"""Ordinations for the Results page.
+
+The PCA of the water parameters standardizes the selected variables and runs
+a single SVD. The parsed water table is a shared cached resource, so toggling
+variables only recomputes the (cheap) decomposition of the chosen subset.
+
+The NMDS of the macroinvertebrate community is Kruskal's non-metric MDS
+fitted by SMACOF on one of the shared distance matrices (see ``distances``).
+The first start is the classical (PCoA) solution and the others are random,
+seeded independently (see ``parallel``); the lowest-stress solution is kept.
+SciPy is only imported inside the NMDS functions and the community loaders,
+so pages that only need the PCA (the Discussion quotes its explained
+variance) do not load it; the "Discussion" stage of ``import_budget.py``
+tracks that import cost.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from community import DEFAULT_SEED
+from data_store import STUDY_VARIABLES, WATER_VARIABLES, dataset_version, load_water
+from parallel import run_batches
+
+PCA_VARIABLES = list(WATER_VARIABLES.values())
+PCA_DEFAULT = STUDY_VARIABLES
+
+
+def pca(values):
+    """PCA of the standardized columns of ``values`` via one SVD.
+
+    Returns ``(scores, loadings, explained)`` where ``loadings`` are the
+    eigenvectors scaled by the singular values (correlations with the PCs)
+    and ``explained`` is the fraction of variance per component.
+    """
+    x = np.asarray(values, dtype=float)
+    z = (x - x.mean(axis=0)) / x.std(axis=0, ddof=1)
+    u, s, vt = np.linalg.svd(z, full_matrices=False)
+    eigenvalues = np.square(s) / (len(z) - 1)
+    scores = u * s
+    loadings = vt.T * np.sqrt(eigenvalues)
+    return scores, loadings, eigenvalues / eigenvalues.sum()
+
+
+@st.cache_data(show_spinner=False)
+def _water_pca(version, variables):
+    water = load_water()
+    data = water[list(variables)].dropna()
+    # Constant columns cannot be standardized
+    data = data.loc[:, data.std(ddof=1) > 0]
+    scores, loadings, explained = pca(data.to_numpy())
+
+    components = [f"PC{i + 1}" for i in range(len(explained))]
+    scores = pd.DataFrame(scores, columns=components, index=data.index)
+    scores = water.loc[data.index, ["season", "site"]].join(scores)
+    loadings = pd.DataFrame(loadings, columns=components, index=data.columns)
+    loadings.index.name = "Variable"
+    explained = pd.Series(explained, index=components, name="Explained")
+    return scores, loadings, explained
+
+
+def water_pca(variables=tuple(PCA_DEFAULT)):
+    """PCA of the chosen water variables: ``(scores, loadings, explained)``.
+
+    Cached per water dataset version and variable subset.
+    """
+    return _water_pca(dataset_version("water"), tuple(variables))
+
+
+NMDS_STARTS = (20, 100)
+NMDS_DIMENSIONS = 2
+NMDS_MAX_ITER = 300
+NMDS_TOLERANCE = 1e-7
+
+
+def _monotone_fit(dissimilarities, distances):
+    """Disparities: isotonic regression of the distances on the dissimilarity order.
+
+    Tied dissimilarities may be fitted in any order (Kruskal's primary
+    approach), so ties are ordered by their current distances.
+    """
+    from scipy.optimize import isotonic_regression
+
+    order = np.lexsort((distances, dissimilarities))
+    fitted = np.empty_like(distances)
+    fitted[order] = isotonic_regression(distances[order]).x
+    return fitted
+
+
+def _stress(distances, fitted):
+    """Kruskal's stress-1."""
+    return float(np.sqrt(np.square(distances - fitted).sum() / np.square(distances).sum()))
+
+
+def _classical_scaling(dissimilarities, k):
+    """PCoA (classical MDS) configuration of a condensed matrix."""
+    from scipy.spatial.distance import squareform
+
+    d = squareform(dissimilarities)
+    n = len(d)
+    centring = np.eye(n) - 1 / n
+    eigenvalues, vectors = np.linalg.eigh(-0.5 * centring @ np.square(d) @ centring)
+    top = np.argsort(eigenvalues)[::-1][:k]
+    return vectors[:, top] * np.sqrt(np.maximum(eigenvalues[top], 1e-12))
+
+
+def _smacof(args):
+    """Fit one NMDS start; returns ``(points, stress)``."""
+    from scipy.spatial.distance import pdist, squareform
+
+    dissimilarities, points, max_iter, tolerance = args
+    n = len(points)
+    target = np.sqrt(len(dissimilarities))  # disparities normalized to this norm
+    previous = np.inf
+    for _ in range(max_iter):
+        distances = pdist(points)
+        fitted = _monotone_fit(dissimilarities, distances)
+        stress = _stress(distances, fitted)
+        if previous - stress < tolerance:
+            break
+        previous = stress
+        # Guttman transform towards the normalized disparities
+        fitted *= target / np.linalg.norm(fitted)
+        ratio = np.divide(fitted, distances, out=np.zeros_like(fitted), where=distances > 0)
+        b = -squareform(ratio)
+        b[np.diag_indices(n)] = -b.sum(axis=1)
+        points = b @ points / n
+    else:
+        distances = pdist(points)
+        stress = _stress(distances, _monotone_fit(dissimilarities, distances))
+    return points, stress
+
+
+def nmds(dissimilarities, k=NMDS_DIMENSIONS, starts=20, seed=DEFAULT_SEED,
+         max_iter=NMDS_MAX_ITER, tolerance=NMDS_TOLERANCE, workers=None):
+    """Lowest-stress NMDS of a condensed dissimilarity matrix over ``starts`` starts.
+
+    Returns ``(points, stress, stresses)``: the ``n x k`` configuration,
+    centred and rotated to its principal axes, its stress-1, and the final
+    stress of every start.
+    """
+    from scipy.spatial.distance import squareform
+
+    dissimilarities = np.asarray(dissimilarities, dtype=float)
+    n = len(squareform(dissimilarities))
+    initial = _classical_scaling(dissimilarities, k)
+    scale = initial.std()
+    configurations = [initial] + [
+        np.random.default_rng(child).normal(scale=scale, size=(n, k))
+        for child in np.random.SeedSequence(seed).spawn(starts - 1)
+    ]
+    jobs = [(dissimilarities, points, max_iter, tolerance) for points in configurations]
+
+    fits = run_batches(_smacof, jobs, workers)
+    stresses = np.array([stress for _, stress in fits])
+    points = fits[int(stresses.argmin())][0]
+    points = points - points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points, full_matrices=False)
+    return points @ vt.T, float(stresses.min()), stresses
+
+
+def shepard(dissimilarities, points):
+    """Shepard diagram data: every pair's dissimilarity, distance and monotone fit.
+
+    Returns the pairs sorted by dissimilarity and the non-metric
+    (1 - stress²) and linear (squared correlation) fit R².
+    """
+    from scipy.spatial.distance import pdist
+
+    distances = pdist(points)
+    fitted = _monotone_fit(dissimilarities, distances)
+    table = pd.DataFrame({
+        "dissimilarity": dissimilarities,
+        "distance": distances,
+        "fitted": fitted,
+    }).sort_values(["dissimilarity", "fitted"], ignore_index=True)
+    r2 = {
+        "nonmetric": 1 - _stress(distances, fitted) ** 2,
+        "linear": float(np.corrcoef(dissimilarities, distances)[0, 1] ** 2),
+    }
+    return table, r2
+
+
+@st.cache_data(show_spinner="Running NMDS starts...")
+def _community_nmds(version, metric, starts, seed):
+    from distances import community_distances
+
+    samples, dissimilarities = community_distances(metric)
+    points, stress, stresses = nmds(dissimilarities, starts=starts, seed=seed)
+    axes = [f"NMDS{i + 1}" for i in range(points.shape[1])]
+    scores = samples.join(pd.DataFrame(points, columns=axes))
+    table, r2 = shepard(dissimilarities, points)
+    return scores, table, {"stress": stress, "stresses": stresses, **r2}
+
+
+def community_nmds(metric="braycurtis", starts=20, seed=DEFAULT_SEED):
+    """NMDS of the community samples: ``(scores, shepard table, diagnostics)``.
+
+    ``diagnostics`` holds the stress, the stress of every start and the
+    Shepard fit R². Cached per dataset version, metric, start count and seed.
+    """
+    return _community_nmds(dataset_version("macro"), metric, starts, seed)
@@ -0,0 +1,199 @@
+"""Per-page rerun benchmark for ``app.py`` built on Streamlit's ``AppTest``.
+
+Every sidebar page is measured in its own fresh interpreter: a cold run (the
+first time the page is rendered in the process, with empty in-memory
+caches) followed by warm reruns. For each run the harness records wall time,
+peak RSS, peak traced allocations (tracemalloc, measured in a separate
+process so tracing does not distort the timings) and the serialized size of
+the ForwardMsg deltas the script produced. Media files (images, downloads)
+are served out of band and not included in the delta size.
+
+    python page_benchmark.py                    # compare with the baseline
+    python page_benchmark.py --update           # write page_benchmark.json
+    python page_benchmark.py --csv results.csv  # also export a CSV
+"""
+
+import argparse
+import csv
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "app.py")
+BASELINE_FILE = os.path.join(HERE, "page_benchmark.json")
+
+# Metric -> allowed fractional increase over the baseline before it is flagged
+THRESHOLDS = {
+    "wall_ms": 0.5,
+    "peak_rss_mb": 0.25,
+    "alloc_peak_mb": 0.25,
+    "delta_bytes": 0.10,
+}
+# Differences below these absolute amounts are noise, never regressions
+NOISE_FLOOR = {"wall_ms": 20, "peak_rss_mb": 5, "alloc_peak_mb": 1, "delta_bytes": 512}
+
+
+def _measuring_app_test():
+    """AppTest whose script runner records the size of the emitted deltas."""
+    from streamlit.testing.v1 import AppTest, app_test
+
+    class MeasuringRunner(app_test.LocalScriptRunner):
+        last_delta_bytes = 0
+
+        def run(self, *args, **kwargs):
+            tree = super().run(*args, **kwargs)
+            MeasuringRunner.last_delta_bytes = sum(m.ByteSize() for m in self.forward_msgs())
+            return tree
+
+    # AppTest builds a new LocalScriptRunner per run; swap in the measuring one
+    app_test.LocalScriptRunner = MeasuringRunner
+    return AppTest, MeasuringRunner
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(page, warm_runs, trace):
+    """Benchmark one page inside this process and print the runs as JSON."""
+    os.chdir(HERE)
+    AppTest, runner = _measuring_app_test()
+    at = AppTest.from_file(APP, default_timeout=300).run()
+
+    runs = []
+    for i in range(warm_runs + 1):
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        at.sidebar.radio[0].set_value(page).run()
+        wall_ms = (time.perf_counter() - start) * 1000
+        run = {
+            "kind": "cold" if i == 0 else "warm",
+            "wall_ms": wall_ms,
+            "peak_rss_mb": _peak_rss_mb(),
+            "delta_bytes": runner.last_delta_bytes,
+            "exceptions": len(at.exception),
+        }
+        if trace:
+            run["alloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        runs.append(run)
+        # Warm runs navigate away and back, as a user switching pages would
+        if i < warm_runs:
+            at.sidebar.radio[0].set_value(at.sidebar.radio[0].options[0]).run()
+    print(json.dumps(runs))
+
+
+def _spawn(page, warm_runs, trace):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", page, "--warm", str(warm_runs)]
+        + (["--trace"] if trace else []),
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _summarize(runs, traced):
+    """Cold run plus the median of the warm runs for every metric."""
+    summary = {}
+    for kind in ("cold", "warm"):
+        timed = [r for r in runs if r["kind"] == kind]
+        allocs = [r["alloc_peak_mb"] for r in traced if r["kind"] == kind]
+        summary[kind] = {
+            "wall_ms": round(statistics.median(r["wall_ms"] for r in timed), 1),
+            "peak_rss_mb": round(max(r["peak_rss_mb"] for r in timed), 1),
+            "alloc_peak_mb": round(statistics.median(allocs), 2),
+            "delta_bytes": int(statistics.median(r["delta_bytes"] for r in timed)),
+            "exceptions": max(r["exceptions"] for r in timed),
+        }
+    return summary
+
+
+def page_names():
+    os.chdir(HERE)
+    AppTest, _ = _measuring_app_test()
+    return list(AppTest.from_file(APP, default_timeout=300).run().sidebar.radio[0].options)
+
+
+def compare(results, baseline):
+    """Regression lines for metrics over their threshold relative to baseline."""
+    regressions = []
+    for page, kinds in results.items():
+        for kind, metrics in kinds.items():
+            base = baseline.get(page, {}).get(kind)
+            if not base:
+                continue
+            for metric, limit in THRESHOLDS.items():
+                old, new = base.get(metric), metrics.get(metric)
+                if old is None or new is None:
+                    continue
+                if new - old > max(old * limit, NOISE_FLOOR[metric]):
+                    regressions.append(
+                        f"{page} [{kind}] {metric}: {old} -> {new} (limit +{limit:.0%})"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--warm", type=int, default=3, help="warm reruns per page")
+    parser.add_argument("--pages", nargs="*", help="pages to run (default: every page)")
+    parser.add_argument("--csv", help="also write the results to this CSV file")
+    parser.add_argument("--update", action="store_true", help="write the baseline file")
+    parser.add_argument("--clear-disk-cache", action="store_true",
+                        help="delete .cache first so cold runs also rebuild disk caches")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child, args.warm, args.trace)
+        return 0
+
+    results = {}
+    for page in args.pages or page_names():
+        if args.clear_disk_cache:
+            shutil.rmtree(os.path.join(HERE, ".cache"), ignore_errors=True)
+        runs = _spawn(page, args.warm, trace=False)
+        traced = _spawn(page, args.warm, trace=True)
+        results[page] = _summarize(runs, traced)
+        cold, warm = results[page]["cold"], results[page]["warm"]
+        print(f"{page:20s} cold {cold['wall_ms']:8.1f} ms  warm {warm['wall_ms']:8.1f} ms  "
+              f"rss {warm['peak_rss_mb']:6.1f} MB  alloc {warm['alloc_peak_mb']:6.2f} MB  "
+              f"deltas {warm['delta_bytes']:8d} B"
+              + ("  EXCEPTIONS" if cold["exceptions"] or warm["exceptions"] else ""))
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["page", "run", *THRESHOLDS, "exceptions"])
+            for page, kinds in results.items():
+                for kind, metrics in kinds.items():
+                    writer.writerow([page, kind, *(metrics[m] for m in THRESHOLDS), metrics["exceptions"]])
+
+    if args.update:
+        with open(BASELINE_FILE, "w") as fh:
+            json.dump(results, fh, indent=2, ensure_ascii=False)
+            fh.write("\n")
+        print(f"Baseline written to {os.path.basename(BASELINE_FILE)}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("No baseline yet; run with --update to create one.")
+        return 0
+    with open(BASELINE_FILE) as fh:
+        regressions = compare(results, json.load(fh))
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
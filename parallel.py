@@ -0,0 +1,52 @@
+"""Seeded batch jobs for the permutation, bootstrap and ordination engines.
+
+Random work is split into batches, and every batch draws from its own child
+of one ``SeedSequence``, so results depend on the seed and the amount of
+work only, not on the number of workers or on whether a process pool ran.
+
+Starting a process pool costs more than most of the app's jobs: the first
+batch always runs in this process, and the remaining batches only go to a
+pool when, at the speed of that first batch, they would take longer than
+``POOL_MIN_SECONDS``.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+POOL_MIN_SECONDS = 0.5
+
+
+def batch_sizes(total, batch_size):
+    """Split ``total`` items into batches of at most ``batch_size``."""
+    sizes = [batch_size] * (total // batch_size)
+    if total % batch_size:
+        sizes.append(total % batch_size)
+    return sizes
+
+
+def run_batches(func, jobs, workers=None):
+    """``[func(job) for job in jobs]``, over a process pool when it pays off.
+
+    ``workers=None`` decides from the timing of the first job; an explicit
+    ``workers`` always uses that many processes (1 runs serially).
+    """
+    jobs = list(jobs)
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(jobs))
+        if workers <= 1 or not jobs:
+            return [func(job) for job in jobs]
+        start = time.perf_counter()
+        first = [func(jobs[0])]
+        if (time.perf_counter() - start) * (len(jobs) - 1) < POOL_MIN_SECONDS:
+            return first + [func(job) for job in jobs[1:]]
+        jobs = jobs[1:]
+        workers = min(workers, len(jobs))
+    else:
+        first = []
+        workers = min(workers, len(jobs))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return first + list(pool.map(func, jobs))
+    return first + [func(job) for job in jobs]
@@ -0,0 +1,237 @@
+"""Full-text search across the study PDFs.
+
+Page text is extracted with MuPDF once per file version and stored with an
+inverted index (term -> pages and character offsets) as JSON under
+``.cache/search``, named after the file's content hash. Queries only read
+the cached indexes: pages are ranked with BM25, and snippets are cut from
+the stored page text around the matches, so a search takes milliseconds.
+
+Indexes are built on first use, by a background thread at app start, or
+ahead of time with::
+
+    python pdf_search.py                 # index every searchable document
+    python pdf_search.py "macroplastic"  # index if needed, then search
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+from html import escape, unescape
+
+import streamlit as st
+
+from documents import DOCUMENTS, document_path
+from file_cache import CACHE_DIR, fingerprint
+from metrics import cache_miss, cached_call, timed
+
+SEARCH_DOCUMENTS = ["study", "presentation"]
+SEARCH_CACHE_DIR = os.path.join(CACHE_DIR, "search")
+INDEX_FORMAT = 1
+MAX_HITS = 8
+SNIPPET_CHARS = 80  # context on each side of the first match
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+WORD = re.compile(r"\w+")
+
+_build_lock = threading.Lock()
+
+
+def tokenize(text):
+    """``(term, offset)`` for every word of ``text``; terms are case-folded."""
+    return [(m.group().casefold(), m.start()) for m in WORD.finditer(text)]
+
+
+def _index_path(digest):
+    return os.path.join(SEARCH_CACHE_DIR, f"{digest[:16]}.json")
+
+
+def build_index(path, digest):
+    """Extract the page text of ``path`` and write its index; returns the index."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        pages = [page.get_text() for page in doc]
+
+    postings = {}
+    lengths = []
+    for page, text in enumerate(pages):
+        tokens = tokenize(text)
+        lengths.append(len(tokens))
+        for term, offset in tokens:
+            entries = postings.setdefault(term, {})
+            entries.setdefault(page, []).append(offset)
+
+    index = {
+        "format": INDEX_FORMAT,
+        "file": os.path.basename(path),
+        "sha256": digest,
+        "pages": pages,
+        "lengths": lengths,
+        "postings": {
+            term: [[page, offsets] for page, offsets in entries.items()]
+            for term, entries in postings.items()
+        },
+    }
+    os.makedirs(SEARCH_CACHE_DIR, exist_ok=True)
+    out = _index_path(digest)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, ensure_ascii=False)
+    os.replace(tmp, out)
+    return index
+
+
+def _read_index(digest):
+    try:
+        with open(_index_path(digest), encoding="utf-8") as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        return None  # Missing or partial index; rebuild it
+    return index if index.get("format") == INDEX_FORMAT else None
+
+
+@st.cache_resource(max_entries=2 * len(SEARCH_DOCUMENTS), show_spinner=False)
+@cache_miss("search_index")
+def _load_index(path, digest):
+    index = _read_index(digest)
+    if index is None:
+        with _build_lock:
+            index = _read_index(digest) or build_index(path, digest)
+    # Posting lists keyed by page for constant-time lookups at query time
+    index["postings"] = {
+        term: {page: offsets for page, offsets in entries}
+        for term, entries in index["postings"].items()
+    }
+    return index
+
+
+@cached_call("search_index")
+def load_index(name):
+    """The index of a document, built once per file version."""
+    path = document_path(name)
+    return _load_index(path, fingerprint(path))
+
+
+def _snippet(text, offsets):
+    """Page text around the first match, with every match in it highlighted."""
+    start = max(0, offsets[0] - SNIPPET_CHARS)
+    end = min(len(text), offsets[0] + SNIPPET_CHARS)
+    parts, cursor = [], start
+    for offset in offsets:
+        if offset < cursor or offset >= end:
+            continue
+        word_end = WORD.match(text, offset).end()
+        parts.append(escape(text[cursor:offset]))
+        parts.append(f"<mark>{escape(text[offset:word_end])}</mark>")
+        cursor = word_end
+    parts.append(escape(text[cursor:end]))
+    snippet = " ".join("".join(parts).split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+@timed("pdf_search")
+def search(query, documents=SEARCH_DOCUMENTS, limit=MAX_HITS):
+    """Pages matching any term of ``query``, best first.
+
+    Every hit is a dict with the document key, 0-based page, BM25 score and
+    an HTML snippet with the matches in ``<mark>``.
+    """
+    terms = list(dict.fromkeys(term for term, _ in tokenize(query)))
+    if not terms:
+        return []
+    indexes = {name: load_index(name) for name in documents}
+    pages = sum(len(index["lengths"]) for index in indexes.values())
+    average = sum(sum(index["lengths"]) for index in indexes.values()) / max(pages, 1)
+
+    scores = {}
+    for term in terms:
+        frequency = sum(len(index["postings"].get(term, ())) for index in indexes.values())
+        if not frequency:
+            continue
+        idf = math.log(1 + (pages - frequency + 0.5) / (frequency + 0.5))
+        for name, index in indexes.items():
+            for page, offsets in index["postings"].get(term, {}).items():
+                norm = 1 - BM25_B + BM25_B * index["lengths"][page] / average
+                tf = len(offsets)
+                scores[name, page] = scores.get((name, page), 0.0) + idf * (
+                    tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                )
+
+    hits = []
+    for (name, page), score in sorted(scores.items(), key=lambda kv: -kv[1])[:limit]:
+        index = indexes[name]
+        offsets = sorted(
+            offset for term in terms for offset in index["postings"].get(term, {}).get(page, ())
+        )
+        hits.append({
+            "document": name,
+            "page": page,
+            "score": score,
+            "snippet": _snippet(index["pages"][page], offsets),
+        })
+    return hits
+
+
+def search_sidebar(on_open, container=st.sidebar):
+    """Search box with ranked page hits; ``on_open(name, page)`` shows a hit in-app."""
+    query = container.text_input("🔎 Search the study documents", key="pdf-search")
+    if not query.strip():
+        return
+    try:
+        hits = search(query)
+    except Exception as e:
+        container.error(f"Search failed. Error: {e}")
+        return
+    if not hits:
+        container.caption("No matching pages.")
+    for i, hit in enumerate(hits):
+        name, page = hit["document"], hit["page"]
+        container.markdown(
+            f"**{escape(DOCUMENTS[name][0])}**, page {page + 1}  \n{hit['snippet']}",
+            unsafe_allow_html=True,
+        )
+        container.button("Open page", key=f"pdf-search-hit-{i}", on_click=on_open, args=(name, page))
+
+
+def build_all(documents=SEARCH_DOCUMENTS):
+    """Build the missing indexes of ``documents``."""
+    for name in documents:
+        path = document_path(name)
+        digest = fingerprint(path)
+        with _build_lock:
+            if _read_index(digest) is None:
+                build_index(path, digest)
+
+
+@st.cache_resource(show_spinner=False)
+def start_index_build():
+    """Build the missing indexes once per process on a daemon thread."""
+    thread = threading.Thread(target=build_all, name="pdf-index", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and search the study PDFs.")
+    parser.add_argument("query", nargs="?", help="search after indexing")
+    args = parser.parse_args(argv)
+
+    for name in SEARCH_DOCUMENTS:
+        index = load_index(name)
+        print(f"{index['file']}: {len(index['pages'])} pages, {len(index['postings'])} terms "
+              f"-> {_index_path(index['sha256'])}")
+    if args.query:
+        for hit in search(args.query):
+            snippet = unescape(re.sub(r"</?mark>", "*", hit["snippet"]))
+            print(f"{DOCUMENTS[hit['document']][0]} p.{hit['page'] + 1} "
+                  f"({hit['score']:.2f}): {snippet}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""QR code assets for links shown in the app.
+
+Codes are generated as SVG (no PIL work), or as PNG at a requested pixel
+size, and memoized per (url, size, error-correction level) in a process-wide
+cache. ``start_prewarm`` fills that cache for the known links on a
+background thread when the app starts, so no page visit pays for encoding.
+"""
+
+import threading
+
+import streamlit as st
+
+from metrics import cache_miss, cached_call
+
+ERROR_CORRECTION_LEVELS = ("L", "M", "Q", "H")
+DEFAULT_SIZE = 148  # px (37 modules at 4 px, as before)
+BORDER = 4  # quiet-zone modules
+
+# Link label -> URL shown as QR codes on the Acknowledgments page
+ASRG_LINKS = {
+    "ASRG Facebook": "https://www.facebook.com/AquaticSystemsResearchGroup",
+    "ASRG Website": "http://www.aquasystems-res.com",
+}
+
+
+def _matrix(url, error_correction):
+    import qrcode
+
+    level = getattr(qrcode.constants, f"ERROR_CORRECT_{error_correction}")
+    qr = qrcode.QRCode(error_correction=level, border=BORDER)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+@cache_miss("qr_svg")
+def _qr_svg(url, size, error_correction):
+    matrix = _matrix(url, error_correction)
+    n = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if row[x]:
+                start = x
+                while x < n and row[x]:
+                    x += 1
+                path.append(f"M{start},{y}h{x - start}v1h{start - x}z")
+            else:
+                x += 1
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="white"/>'
+        f'<path d="{"".join(path)}" fill="black"/></svg>'
+    )
+
+
+@cached_call("qr_svg")
+def qr_svg(url, size=DEFAULT_SIZE, error_correction="M"):
+    """SVG markup of the QR code for ``url``, ``size`` pixels square."""
+    # Always pass every argument: the cache keys on the arguments as given
+    return _qr_svg(url, size, error_correction)
+
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+@cache_miss("qr_png")
+def _qr_png(url, size, error_correction):
+    from io import BytesIO
+
+    from PIL import Image
+
+    matrix = _matrix(url, error_correction)
+    n = len(matrix)
+    scale = max(1, -(-size // n))  # whole pixels per module
+    img = Image.new("1", (n, n), 1)
+    img.putdata([0 if dark else 1 for row in matrix for dark in row])
+    img = img.resize((n * scale, n * scale), Image.NEAREST)
+    buf = BytesIO()
+    img.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+@cached_call("qr_png")
+def qr_png(url, size=DEFAULT_SIZE, error_correction="M"):
+    """PNG bytes of the QR code for ``url``, at least ``size`` pixels square."""
+    return _qr_png(url, size, error_correction)
+
+
+def prewarm(urls=None, size=DEFAULT_SIZE):
+    """Generate the SVG codes for ``urls`` (default: every known link)."""
+    for url in urls or ASRG_LINKS.values():
+        qr_svg(url, size)
+
+
+@st.cache_resource(show_spinner=False)
+def start_prewarm():
+    """Prewarm the QR cache once per process on a daemon thread."""
+    thread = threading.Thread(target=prewarm, name="qr-prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,187 @@
+"""Rarefaction, extrapolation and bootstrap confidence intervals.
+
+The pooled samples are summed per season and substrate, so each group has
+one taxon abundance vector, and the groups are compared at equal sampling
+effort:
+
+* rarefaction curves shuffle the individuals of a group once per replicate:
+  the taxa among the first m individuals are a subsample of depth m drawn
+  without replacement, so one shuffle (and one vectorized first-occurrence
+  pass over all replicates) yields the whole curve;
+* beyond the observed abundance, richness is extrapolated with the Chao1
+  based estimator of Chao et al. (2014);
+* extrapolated richness and the diversity indices get intervals from the
+  bootstrap standard error of multinomial resamples of the group (estimate
+  +/- z SE, as in Chao et al.), and every index is also rarefied to the
+  smallest group's abundance, with percentile intervals.
+
+Replicates are split into independently seeded batches per group (see
+``parallel``).
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from community import DEFAULT_SEED
+from data_store import dataset_version, load_community
+from diversity import INDICES, diversity_indices
+from parallel import batch_sizes, run_batches
+
+REPLICATE_CHOICES = (1000, 5000)
+BATCH_SIZE = 250
+CURVE_POINTS = 40
+EXTRAPOLATION = 2  # curves run to this multiple of the observed abundance
+CONFIDENCE = 0.95
+GROUP_COLUMNS = ["season", "substrate"]
+
+
+def group_abundances(samples, counts, by=GROUP_COLUMNS):
+    """Sum the sample rows per group; returns (groups, groups x taxa counts)."""
+    codes = samples.groupby(by, sort=True).ngroup().to_numpy()
+    totals = np.zeros((codes.max() + 1, counts.shape[1]), dtype="int64")
+    np.add.at(totals, codes, counts)
+    groups = samples[by].drop_duplicates().sort_values(by).reset_index(drop=True)
+    return groups, totals
+
+
+def curve_depths(n, points=CURVE_POINTS, extrapolation=EXTRAPOLATION):
+    """Integer sample sizes of a curve, always including ``n`` itself."""
+    depths = np.linspace(1, n * extrapolation, points).round().astype("int64")
+    return np.unique(np.append(depths, n))
+
+
+def extrapolated_richness(counts, extra):
+    """Chao et al. (2014) richness of each row of ``counts`` after ``extra`` more individuals."""
+    counts = np.atleast_2d(counts)
+    n = counts.sum(axis=1).astype(float)
+    observed = (counts > 0).sum(axis=1)
+    f1 = (counts == 1).sum(axis=1)
+    f2 = (counts == 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f0 = np.where(f2 > 0, (n - 1) / n * f1 ** 2 / (2 * f2), (n - 1) / n * f1 * (f1 - 1) / 2)
+        unseen = np.where(f0 > 0, f0 * (1 - (1 - f1 / (n * f0 + f1)) ** extra), 0.0)
+    return observed + unseen
+
+
+def _first_occurrences(abundances, size, rng):
+    """Position of each taxon's first individual in ``size`` random orders."""
+    n = int(abundances.sum())
+    labels = np.repeat(np.arange(len(abundances)), abundances)
+    order = rng.permuted(np.tile(labels, (size, 1)), axis=1)
+    first = np.full((size, len(abundances)), n)
+    np.minimum.at(first, (np.arange(size)[:, None], order), np.arange(n)[None, :])
+    return first
+
+
+def _replicate_batch(args):
+    """Richness curves, bootstrap indices and rarefied indices for one batch."""
+    abundances, depths, common_depth, size, seed = args
+    rng = np.random.default_rng(seed)
+    n = int(abundances.sum())
+
+    richness = np.empty((size, len(depths)))
+    inside = depths <= n
+    first = _first_occurrences(abundances, size, rng)
+    richness[:, inside] = (first[:, :, None] < depths[inside]).sum(axis=1)
+
+    resampled = rng.multinomial(n, abundances / n, size=size)
+    for j in np.flatnonzero(~inside):
+        richness[:, j] = extrapolated_richness(resampled, depths[j] - n)
+
+    rarefied = rng.multivariate_hypergeometric(abundances, common_depth, size=size, method="count")
+    return (
+        richness,
+        diversity_indices(resampled)[list(INDICES)].to_numpy(),
+        diversity_indices(rarefied)[list(INDICES)].to_numpy(),
+    )
+
+
+def rarefaction(groups, abundances, replicates=1000, seed=DEFAULT_SEED, workers=None):
+    """Rarefaction/extrapolation curves and index intervals per group.
+
+    Returns ``(curves, intervals)``. ``curves`` has one row per group and
+    depth, with the mean richness, its interval and whether the point is
+    interpolated, observed or extrapolated. ``intervals`` has one row per
+    group and index, giving the observed value and its bootstrap interval,
+    plus the value rarefied to the smallest group abundance and its interval.
+    """
+    abundances = np.asarray(abundances, dtype="int64")
+    totals = abundances.sum(axis=1)
+    common_depth = int(totals[totals > 0].min())
+    tail = (1 - CONFIDENCE) / 2 * 100
+    z = NormalDist().inv_cdf(1 - (1 - CONFIDENCE) / 2)
+
+    sizes = batch_sizes(replicates, BATCH_SIZE)
+    group_seeds = np.random.SeedSequence(seed).spawn(len(abundances))
+    depths = [curve_depths(int(n)) for n in totals]
+    jobs, owners = [], []
+    for g, (row, n) in enumerate(zip(abundances, totals)):
+        if n == 0:
+            continue
+        for size, child in zip(sizes, group_seeds[g].spawn(len(sizes))):
+            jobs.append((row, depths[g], common_depth, size, child))
+            owners.append(g)
+
+    batches = run_batches(_replicate_batch, jobs, workers)
+
+    observed = diversity_indices(abundances)
+    curves, intervals = [], []
+    for g in sorted(set(owners)):
+        parts = [batch for batch, owner in zip(batches, owners) if owner == g]
+        richness, boot, rarefied = (np.concatenate(arrays) for arrays in zip(*parts))
+        label = groups.iloc[g].to_dict()
+        n, inside = totals[g], depths[g] <= totals[g]
+
+        # Interpolation: percentiles of the subsamples; extrapolation: estimate +/- z SE
+        mean = richness.mean(axis=0)
+        lower, upper = np.percentile(richness, [tail, 100 - tail], axis=0)
+        estimate = extrapolated_richness(abundances[g], depths[g][~inside] - n)
+        spread = z * richness[:, ~inside].std(axis=0, ddof=1)
+        observed_richness = observed["richness"].iloc[g]
+        mean[~inside] = estimate
+        lower[~inside] = np.maximum(estimate - spread, observed_richness)
+        upper[~inside] = estimate + spread
+        curves.append(pd.DataFrame({
+            **label,
+            "individuals": depths[g],
+            "richness": mean,
+            "lower": lower,
+            "upper": upper,
+            "method": np.select([depths[g] < n, depths[g] == n], ["interpolated", "observed"],
+                                "extrapolated"),
+        }))
+
+        boot_se = np.nanstd(boot, axis=0, ddof=1)
+        rare_ci = np.nanpercentile(rarefied, [tail, 100 - tail], axis=0)
+        for i, index in enumerate(INDICES):
+            value = observed[index].iloc[g]
+            intervals.append({
+                **label,
+                "index": INDICES[index],
+                "observed": value,
+                "lower": value - z * boot_se[i],
+                "upper": value + z * boot_se[i],
+                "rarefied": np.nanmean(rarefied[:, i]),
+                "rarefied lower": rare_ci[0, i],
+                "rarefied upper": rare_ci[1, i],
+                "depth": common_depth,
+            })
+    return pd.concat(curves, ignore_index=True), pd.DataFrame(intervals)
+
+
+@st.cache_data(show_spinner="Running rarefaction replicates...")
+def _community_rarefaction(version, replicates, seed):
+    samples, counts, _ = load_community()
+    groups, abundances = group_abundances(samples, counts)
+    return rarefaction(groups, abundances, replicates, seed)
+
+
+def community_rarefaction(replicates=1000, seed=DEFAULT_SEED):
+    """Rarefaction curves and bootstrap intervals per season and substrate.
+
+    Cached per dataset version, replicate count and seed.
+    """
+    return _community_rarefaction(dataset_version("macro"), replicates, seed)
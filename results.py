@@ -0,0 +1,351 @@
+"""Sections of the Results page.
+
+Sections with widgets are Streamlit fragments: interacting with them reruns
+only that section, not the whole script. Everything they display comes
+from the shared caches in the data and analysis modules, so a fragment
+rerun only costs the work for the widget that changed.
+"""
+
+from functools import partial
+
+import streamlit as st
+
+from charts import (
+    index_boxplot,
+    nmds_plot,
+    pca_biplot,
+    rarefaction_plot,
+    scree_plot,
+    shepard_plot,
+)
+from community import (
+    DEFAULT_SEED,
+    PERMUTATION_CHOICES,
+    SIMPER_COMPARISONS,
+    community_permanova,
+    community_simper,
+)
+from data_store import XLSX_MIME, dataset_path, load_bytes, load_frame, season_pairs
+from distances import DISTANCE_METRICS
+from diversity import (
+    INDICES,
+    abundance_totals,
+    group_summary,
+    index_significance,
+    sample_indices,
+)
+from explorer import community_explorer, paged_dataframe
+from exports import ZIP_MIME, bundle_name, dataset_bundle
+from metrics import timed
+from ordination import (
+    NMDS_STARTS,
+    PCA_DEFAULT,
+    PCA_VARIABLES,
+    community_nmds,
+    water_pca,
+)
+from rarefaction import CONFIDENCE, REPLICATE_CHOICES, community_rarefaction
+from stats_tests import ALPHA, water_quality_tests
+from tables import (
+    SIGNIFICANT,
+    html_table,
+    label_cell,
+    p_cell,
+    p_value_cell,
+    permanova_items,
+    simper_items,
+    statistic_cell,
+)
+
+# Dataset key -> section title
+DATASET_TITLES = {
+    "macro": "Macroinvertebrates Data",
+    "water": "Water Parameters Data",
+    "diversity": "Diversity Indices Data",
+}
+
+
+def season_pair_select(name, key):
+    """The study's S1 vs S2, or a choice of consecutive seasons once more are ingested.
+
+    Returns None, after a notice, while the dataset holds a single season.
+    """
+    pairs = season_pairs(name)
+    if not pairs:
+        st.info("Only one season is available, so there is no season comparison yet.")
+        return None
+    if len(pairs) == 1:
+        return pairs[0]
+    return st.selectbox("Seasons compared", pairs, format_func=" vs ".join, key=key)
+
+
+@st.fragment
+@timed("results:environmental")
+def environmental_section():
+    pca_variables = st.multiselect(
+        "PCA variables", PCA_VARIABLES, default=PCA_DEFAULT,
+        help="Variables are standardized before the PCA.",
+    )
+    if len(pca_variables) < 2:
+        st.warning("Select at least two variables for the PCA.")
+        pca_explained = None
+    else:
+        try:
+            pca_scores, pca_loadings, pca_explained = water_pca(pca_variables)
+            pca_col1, pca_col2 = st.columns([2, 1])
+            pca_col1.altair_chart(pca_biplot(pca_scores, pca_loadings, pca_explained), use_container_width=True)
+            pca_col2.altair_chart(scree_plot(pca_explained), use_container_width=True)
+            with st.expander("PCA loadings"):
+                st.dataframe(pca_loadings.round(3), use_container_width=True)
+        except Exception as e:
+            pca_explained = None
+            st.error(f"Failed to compute the PCA. Error: {e}")
+
+    pca_share = f"{pca_explained.iloc[:2].sum():.1%}" if pca_explained is not None else "—"
+    st.markdown(f"""
+    PCA (PC1 and PC2) explained {pca_share} of the variance in environmental variables.
+    A clear separation between the two seasons was observed.  
+    **Season 1 (S1, winter)** exhibited greater variability in physio-chemical conditions,  
+    while **Season 2 (S2, spring)** maintained more stable conditions.
+    """)
+
+
+@st.fragment
+@timed("results:water_quality_table")
+def water_quality_table():
+    try:
+        seasons = season_pair_select("water", key="table1-seasons")
+        if seasons is None:
+            return
+        table1 = water_quality_tests(seasons=seasons)
+        table1_html = html_table(
+            ["Variable", "Test Statistics", "p-value"],
+            [
+                [label_cell(variable), statistic_cell(row), p_value_cell(row)]
+                for variable, row in table1.iterrows()
+            ],
+        )
+        st.markdown(table1_html, unsafe_allow_html=True)
+        st.caption(
+            f"{seasons[0]} vs {seasons[1]} paired by site. Shapiro–Wilk on the paired differences selects "
+            "a paired t-test (t) or a Wilcoxon signed-rank test (Z)."
+        )
+        with st.expander("Test details"):
+            st.dataframe(table1, use_container_width=True)
+    except Exception as e:
+        st.error(f"Failed to compute water quality tests. Error: {e}")
+
+
+def _and_list(items):
+    """``"a, b and c"``"""
+    items = list(items)
+    return " and ".join([", ".join(items[:-1]), items[-1]] if len(items) > 1 else items)
+
+
+def composition_section():
+    try:
+        totals = abundance_totals()
+        collected = _and_list(f"*{n:,}* in {season}" for season, n in totals.sum(axis=1).items())
+        lines = [f"Individuals collected: {collected}."]
+        lines += [
+            f"- {season}: " + ", ".join(f"{substrate} ({n:,})" for substrate, n in row.items())
+            for season, row in totals.iterrows()
+        ]
+        st.markdown("\n".join(lines))
+    except Exception as e:
+        st.error(f"Failed to count the macroinvertebrates. Error: {e}")
+
+
+def _significance_note(rows, seasons):
+    """Interpretation of the Table 2 rows for the compared ``seasons``."""
+    pair = " and ".join(seasons)
+    tested = [row for row in rows if row["season"]]
+    stable = [row["index"] for row in tested if row["season"]["p"] >= ALPHA]
+    varying = [row["index"] for row in rows if row["substrate"] and row["substrate"]["p"] < ALPHA]
+    lines = []
+    if tested:
+        lines.append(f"{_and_list(stable)} did not differ significantly between {pair}." if stable
+                     else f"Every index differed significantly between {pair}.")
+    lines.append(f'{_and_list(varying)} showed significant variation in substrates '
+                 f'(<span style="{SIGNIFICANT}">P<{ALPHA:g}</span>).' if varying
+                 else "No index varied significantly between substrates.")
+    return "  \n".join(lines)
+
+
+@st.fragment
+@timed("results:diversity")
+def diversity_section():
+    try:
+        index_df = sample_indices()
+        chart_cols = list(st.columns(3)) + list(st.columns(2))
+        chart_order = ["abundance", "evenness", "shannon", "simpson", "richness"]
+        for col, index in zip(chart_cols, chart_order):
+            col.altair_chart(index_boxplot(index_df, index, INDICES[index]), use_container_width=True)
+
+        with st.expander("Mean diversity indices by season and substrate"):
+            st.dataframe(group_summary().round(3), use_container_width=True)
+
+        # Table 2: Diversity indices
+        st.markdown("### Table 2: Significance of Macroinvertebrate Diversity Indices Between Substrates and Seasons")
+        seasons = season_pair_select("macro", key="table2-seasons")
+        if seasons is None:
+            return
+        rows = index_significance(seasons)
+        table2_html = html_table(
+            ["Diversity indices", "Substrates", "Seasons"],
+            [[label_cell(row["index"]), p_cell(row["substrate"]), p_cell(row["season"])] for row in rows],
+        )
+        st.markdown(table2_html, unsafe_allow_html=True)
+        st.markdown(_significance_note(rows, seasons), unsafe_allow_html=True)
+    except Exception as e:
+        st.error(f"Failed to compute diversity indices. Error: {e}")
+
+
+@st.fragment
+@timed("results:rarefaction")
+def rarefaction_section():
+    replicates = st.selectbox(
+        "Bootstrap replicates", REPLICATE_CHOICES,
+        help=f"Seed {DEFAULT_SEED}; intervals are {CONFIDENCE:.0%}.",
+    )
+    try:
+        curves, intervals = community_rarefaction(replicates)
+        st.altair_chart(rarefaction_plot(curves), use_container_width=True)
+        depth = intervals["depth"].iloc[0]
+        st.caption(
+            "Solid lines are rarefied (random subsamples of individuals), dashed lines "
+            f"extrapolated (Chao 1 estimator). \"Rarefied\" indices are evaluated at {depth} "
+            "individuals, the smallest season/substrate total, so groups are compared at "
+            "equal sampling effort."
+        )
+        st.dataframe(
+            intervals.drop(columns="depth"),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                col: st.column_config.NumberColumn(format="%.3f")
+                for col in intervals.columns[3:-1]
+            },
+        )
+    except Exception as e:
+        st.error(f"Failed to compute rarefaction. Error: {e}")
+
+
+@st.fragment
+@timed("results:dataset")
+def dataset_section(name):
+    title = DATASET_TITLES[name]
+    st.write(f"### {title}")
+    try:
+        if name == "macro":
+            community_explorer()
+        else:
+            paged_dataframe(load_frame(name), key=name)
+        st.download_button(
+            label=f"Download {title}",
+            data=partial(load_bytes, name),
+            file_name=dataset_path(name),
+            mime=XLSX_MIME
+        )
+    except Exception as e:
+        st.error(f"Excel dataset not found or failed to load. Error: {e}")
+
+
+def bundle_download():
+    try:
+        st.download_button(
+            label="Download all datasets (ZIP: XLSX, Parquet, CSV)",
+            data=dataset_bundle,
+            file_name=bundle_name(),
+            mime=ZIP_MIME,
+            help="Original workbooks plus tidy Parquet and CSV tables and a "
+                 "manifest with SHA-256 checksums.",
+        )
+    except Exception as e:
+        st.error(f"Failed to prepare the dataset bundle. Error: {e}")
+
+
+@st.fragment
+@timed("results:permanova")
+def permanova_section():
+    permutations = st.selectbox(
+        "PERMANOVA permutations",
+        PERMUTATION_CHOICES,
+        help="Bray–Curtis dissimilarities, sequential sums of squares, seed "
+             f"{DEFAULT_SEED}.",
+    )
+    try:
+        permanova_table = community_permanova(permutations)
+        permanova_html = permanova_items(permanova_table)
+    except Exception as e:
+        permanova_table = None
+        permanova_html = f"<li>PERMANOVA failed: {e}</li>"
+
+    try:
+        simper_html = simper_items(community_simper("Plastic vs Natural"), "Plastic", "Natural")
+    except Exception as e:
+        simper_html = f"<li>SIMPER failed: {e}</li>"
+
+    perm_html = f"""
+    <ul>
+        <li><strong>PERMANOVA</strong>
+            <ul>
+                {permanova_html}
+            </ul>
+        </li>
+        <li><strong>SIMPER</strong> (Plastic vs Natural)
+            <ul>
+                {simper_html}
+            </ul>
+        </li>
+    </ul>
+    """
+    st.markdown(perm_html, unsafe_allow_html=True)
+    if permanova_table is not None:
+        with st.expander("Full PERMANOVA table"):
+            st.dataframe(permanova_table.round(4), use_container_width=True)
+
+
+@st.fragment
+@timed("results:simper")
+def simper_section():
+    comparison = st.selectbox("Comparison", list(SIMPER_COMPARISONS))
+    try:
+        simper_table = community_simper(comparison)
+        st.dataframe(
+            simper_table,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                col: st.column_config.NumberColumn(format="%.2f")
+                for col in simper_table.columns[1:]
+            },
+        )
+    except Exception as e:
+        st.error(f"Failed to compute SIMPER. Error: {e}")
+
+
+@st.fragment
+@timed("results:nmds")
+def nmds_section():
+    col1, col2 = st.columns(2)
+    metric = col1.selectbox("Dissimilarity", list(DISTANCE_METRICS),
+                            format_func=DISTANCE_METRICS.get, key="nmds-metric")
+    starts = col2.selectbox(
+        "Starts", NMDS_STARTS, key="nmds-starts",
+        help=f"Seed {DEFAULT_SEED}; the lowest-stress solution is kept.",
+    )
+    try:
+        scores, shepard_table, fit = community_nmds(metric, starts)
+        nmds_col1, nmds_col2 = st.columns([2, 1])
+        nmds_col1.altair_chart(nmds_plot(scores, fit["stress"]), use_container_width=True)
+        nmds_col2.altair_chart(shepard_plot(shepard_table), use_container_width=True)
+        repeats = int((fit["stresses"] <= fit["stress"] + 1e-3).sum())
+        st.caption(
+            f"Two-dimensional NMDS on {DISTANCE_METRICS[metric]} dissimilarities, best of "
+            f"{starts} starts ({repeats} within 0.001 of the lowest stress). Shepard fit: "
+            f"non-metric R² = {fit['nonmetric']:.3f}, linear R² = {fit['linear']:.3f}. "
+            "Stress below 0.2 is usually considered a usable ordination."
+        )
+    except Exception as e:
+        st.error(f"Failed to compute NMDS. Error: {e}")
@@ -0,0 +1,122 @@
+"""Persistent columnar store of the seasons ingested after the study.
+
+Every ingested season of a dataset is one Parquet partition,
+``store/<dataset>/season=<season>/<hash>.parquet``, named after the content
+hash of the workbook it came from. ``store/manifest.json`` records the
+current partition of each season and the files that were rejected.
+Re-ingesting a season replaces its partition.
+
+Kept free of heavy imports at module level (pandas is imported on use), so
+that the startup watcher can use it cheaply.
+"""
+
+import json
+import os
+import threading
+from datetime import UTC, datetime
+
+STORE_DIR = os.environ.get("APP_STORE_DIR", "store")
+MANIFEST_FILE = os.path.join(STORE_DIR, "manifest.json")
+
+_lock = threading.RLock()
+_manifest_cache = {}  # (mtime_ns, size) -> parsed manifest
+
+
+def season_number(season):
+    """Sort key for season labels: S2 before S10."""
+    digits = "".join(ch for ch in str(season) if ch.isdigit())
+    return (int(digits) if digits else 0, str(season))
+
+
+def manifest():
+    """The store manifest, re-read only when the file changes."""
+    try:
+        stat = os.stat(MANIFEST_FILE)
+    except FileNotFoundError:
+        return {"partitions": {}, "rejected": {}}
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if stamp not in _manifest_cache:
+            with open(MANIFEST_FILE) as fh:
+                _manifest_cache.clear()
+                _manifest_cache[stamp] = json.load(fh)
+        return _manifest_cache[stamp]
+
+
+def _write_manifest(data):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp = f"{MANIFEST_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    os.replace(tmp, MANIFEST_FILE)
+
+
+def partitions(dataset):
+    """``((season, version), ...)`` of the stored partitions, in season order.
+
+    The tuple is hashable, so it can key caches of everything derived from
+    the stored seasons.
+    """
+    stored = manifest()["partitions"].get(dataset, {})
+    return tuple(
+        (season, entry["sha256"][:16])
+        for season, entry in sorted(stored.items(), key=lambda kv: season_number(kv[0]))
+    )
+
+
+def is_known(digest):
+    """Whether a workbook with this SHA-256 was already ingested or rejected."""
+    data = manifest()
+    if digest in data["rejected"]:
+        return True
+    return any(
+        entry["sha256"] == digest
+        for seasons in data["partitions"].values()
+        for entry in seasons.values()
+    )
+
+
+def partition_path(dataset, season, version):
+    return os.path.join(STORE_DIR, dataset, f"season={season}", f"{version[:16]}.parquet")
+
+
+def read_partition(dataset, season, version):
+    import pandas as pd
+
+    return pd.read_parquet(partition_path(dataset, season, version))
+
+
+def write_partition(dataset, season, digest, df, source):
+    """Store ``df`` as the partition of ``season``, replacing an older one."""
+    path = partition_path(dataset, season, digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+    with _lock:
+        data = json.loads(json.dumps(manifest()))  # private copy to update
+        seasons = data["partitions"].setdefault(dataset, {})
+        previous = seasons.get(season)
+        seasons[season] = {
+            "sha256": digest,
+            "file": os.path.basename(source),
+            "rows": len(df),
+            "ingested": datetime.now(UTC).isoformat(timespec="seconds"),
+        }
+        _write_manifest(data)
+    if previous and previous["sha256"][:16] != digest[:16]:
+        try:
+            os.remove(partition_path(dataset, season, previous["sha256"]))
+        except OSError:
+            pass
+    return path
+
+
+def record_rejected(digest, source, error):
+    """Remember a workbook that failed validation, so it is not retried."""
+    with _lock:
+        data = json.loads(json.dumps(manifest()))
+        data["rejected"][digest] = {"file": os.path.basename(source), "error": str(error)}
+        _write_manifest(data)
@@ -0,0 +1,387 @@
+"""Static HTML snapshot of the app for hosting on a CDN.
+
+Every sidebar page is run once with Streamlit's ``AppTest`` (widgets at
+their defaults) and the resulting element tree is written out as plain HTML:
+markdown becomes HTML, tables and dataframes become ``<table>``s, charts are
+embedded with vega-embed, and every image, QR code and document is copied
+into ``assets/`` under a content-hashed name so it can be cached forever.
+Pages keep stable names (``index.html``, ``methods.html``, ...); only the
+assets change name when their content does.
+
+Widgets are not rendered. The Results page keeps its computed tables and
+charts, and links to the live app for the interactive explorer when
+``--live-url`` is given. Downloads the app only generates when clicked are
+written out from the same loaders (see ``static_downloads``), and an element
+type without a static rendering fails the build instead of being dropped.
+
+    python snapshot.py                                      # write dist/
+    python snapshot.py --out site --live-url https://app.example.org
+    python snapshot.py --pages "Methods" "References"       # selected pages
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from functools import partial
+from html import escape
+from urllib.parse import unquote
+
+from documents import DOCUMENTS, SIDEBAR_DOCUMENTS, load_document
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "app.py")
+DEFAULT_OUT = os.path.join(HERE, "dist")
+SITE_TITLE = "Ecological Role of Macroplastics"
+INTERACTIVE_PAGE = "Results"
+
+# Element types rendered as nothing: widgets only make sense in the live app
+WIDGET_ELEMENTS = {
+    "button", "checkbox", "color_picker", "date_input", "multiselect", "number_input",
+    "radio", "select_slider", "selectbox", "slider", "text_area", "text_input",
+    "time_input", "toggle",
+}
+
+VEGA_SCRIPTS = (
+    "https://cdn.jsdelivr.net/npm/vega@5",
+    "https://cdn.jsdelivr.net/npm/vega-lite@5",
+    "https://cdn.jsdelivr.net/npm/vega-embed@6",
+)
+
+STYLESHEET = """\
+body { margin: 0; font-family: "Source Sans Pro", sans-serif; color: #31333f; display: flex; }
+nav { width: 16rem; min-height: 100vh; padding: 1.5rem 1rem; background: #f0f2f6; box-sizing: border-box; flex: none; }
+nav a { display: block; padding: .25rem 0; color: #31333f; text-decoration: none; }
+nav a.current { font-weight: bold; }
+nav h3 { margin-top: 1.5rem; }
+main { flex: 1; padding: 2rem 3rem; max-width: 1100px; }
+img { max-width: 100%; }
+figure { margin: 0 0 1rem; }
+figcaption, .caption { color: #808495; font-size: .875rem; }
+.row { display: flex; gap: 1rem; }
+.row > div { min-width: 0; }
+.alert { padding: 1rem; border-radius: .5rem; margin: 1rem 0; }
+.alert-info { background: #e6f0fb; } .alert-warning { background: #fffbe6; }
+.alert-error { background: #fdecea; } .alert-success { background: #e8f5e9; }
+table.dataframe { border-collapse: collapse; font-size: .875rem; margin-bottom: 1rem; }
+table.dataframe th, table.dataframe td { border: 1px solid #e6e9ef; padding: .25rem .5rem; }
+.chart { width: 100%; }
+"""
+
+
+def page_file(page, first=False):
+    """Stable HTML file name for a sidebar page."""
+    if first:
+        return "index.html"
+    return re.sub(r"[^a-z0-9]+", "-", page.lower()).strip("-") + ".html"
+
+
+def _arrow_frame(data):
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def _markdown(text):
+    import markdown
+
+    return markdown.markdown(text, extensions=["extra", "sane_lists"])
+
+
+class AssetWriter:
+    """Writes assets once under content-hashed names and lists them."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.files = {}  # relative path -> size in bytes
+        os.makedirs(os.path.join(out_dir, "assets"), exist_ok=True)
+
+    def add(self, data, name, mimetype=None):
+        """Write ``data`` as ``assets/<stem>.<hash>.<ext>``; returns the relative path."""
+        if isinstance(data, str):
+            data = data.encode()
+        stem, ext = os.path.splitext(os.path.basename(name))
+        if not ext and mimetype:
+            ext = mimetypes.guess_extension(mimetype) or ""
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        rel = f"assets/{stem}.{digest}{ext}"
+        if rel not in self.files:
+            tmp = os.path.join(self.out_dir, f"{rel}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, os.path.join(self.out_dir, rel))
+            self.files[rel] = len(data)
+        return rel
+
+
+class PageRenderer:
+    """Converts the element tree of one ``AppTest`` run into HTML."""
+
+    def __init__(self, assets, media, downloads):
+        self.assets = assets
+        self.media = media
+        self.downloads = downloads
+        self.charts = 0
+        self.counter = 0
+
+    def media_bytes(self, url):
+        """Bytes and mimetype behind an image or download URL of the run."""
+        if url.startswith("data:"):
+            header, _, payload = url.partition(",")
+            mimetype = header[5:].split(";")[0]
+            data = base64.b64decode(payload) if ";base64" in header else unquote(payload).encode()
+            return data, mimetype
+        file = self.media.get_file(os.path.basename(url))
+        return file.content, file.mimetype
+
+    def render(self, node):
+        if hasattr(node, "children"):
+            return self.block(node)
+        if node.type in WIDGET_ELEMENTS:
+            return ""
+        handler = getattr(self, f"element_{node.type}", None)
+        if handler is None:
+            raise ValueError(f"No static rendering for {node.type!r} elements")
+        return handler(node.proto)
+
+    def children(self, node):
+        return "".join(self.render(child) for _, child in sorted(node.children.items()))
+
+    def block(self, node):
+        inner = self.children(node)
+        kind = node.type
+        if kind == "flex_container":
+            container = node.proto.flex_container
+            if container.direction == container.HORIZONTAL:
+                return f'<div class="row">{inner}</div>'
+            return f"<div>{inner}</div>"
+        if kind == "column":
+            return f'<div style="flex: {node.proto.weight:g} 1 0">{inner}</div>'
+        if kind == "expander":
+            return f"<details><summary>{escape(node.proto.label)}</summary>{inner}</details>"
+        if kind == "tab":
+            return f"<section><h4>{escape(node.proto.label)}</h4>{inner}</section>"
+        if kind in ("main", "sidebar", "tab_container", "form"):
+            return inner
+        raise ValueError(f"No static rendering for {kind!r} blocks")
+
+    def element_markdown(self, proto):
+        return _markdown(proto.body)
+
+    def element_caption(self, proto):
+        return f'<div class="caption">{_markdown(proto.body)}</div>'
+
+    def element_divider(self, proto):
+        return "<hr>"
+
+    def _heading(self, proto, tag):
+        return f"<{tag}>{escape(proto.body)}</{tag}>"
+
+    def element_title(self, proto):
+        return self._heading(proto, "h1")
+
+    def element_header(self, proto):
+        return self._heading(proto, "h2")
+
+    def element_subheader(self, proto):
+        return self._heading(proto, "h3")
+
+    def _alert(self, proto, kind):
+        return f'<div class="alert alert-{kind}">{_markdown(proto.body)}</div>'
+
+    def element_info(self, proto):
+        return self._alert(proto, "info")
+
+    def element_success(self, proto):
+        return self._alert(proto, "success")
+
+    def element_warning(self, proto):
+        return self._alert(proto, "warning")
+
+    def element_error(self, proto):
+        return self._alert(proto, "error")
+
+    def element_image(self, proto):
+        figures = []
+        for img in proto.imgs:
+            # Older Streamlit versions inline SVGs as ``markup`` data URLs
+            data, mimetype = self.media_bytes(img.url or getattr(img, "markup", ""))
+            self.counter += 1
+            src = self.assets.add(data, f"image{self.counter}", mimetype)
+            caption = f"<figcaption>{escape(img.caption)}</figcaption>" if img.caption else ""
+            figures.append(f'<figure><img src="{src}" alt="{escape(img.caption)}">{caption}</figure>')
+        return "".join(figures)
+
+    def element_dataframe(self, proto):
+        import pandas as pd
+
+        df = _arrow_frame(proto.arrow_data.data)
+        index = not isinstance(df.index, pd.RangeIndex)
+        return df.to_html(index=index, border=0, na_rep="", float_format=lambda v: f"{v:.4g}")
+
+    def element_vega_lite_chart(self, proto):
+        spec = json.loads(proto.spec)
+        if proto.data.data:
+            spec["data"] = {"values": _records(proto.data.data)}
+        if proto.datasets:
+            spec["datasets"] = {ds.name: _records(ds.data.data) for ds in proto.datasets}
+        self.charts += 1
+        src = self.assets.add(json.dumps(spec, default=str), f"chart{self.charts}.json")
+        return (
+            f'<div class="chart" id="chart{self.charts}"></div>'
+            f'<script>vegaEmbed("#chart{self.charts}", "{src}", {{actions: false}});</script>'
+        )
+
+    def element_download_button(self, proto):
+        if proto.url:
+            data, mimetype = self.media_bytes(proto.url)
+            href = self.assets.add(data, proto.label, mimetype)
+        elif proto.label in self.downloads:
+            # Deferred downloads (data=callable) have no URL until clicked
+            data, file_name = self.downloads[proto.label]()
+            href = self.assets.add(data, file_name)
+        else:
+            raise ValueError(f"No static file for the deferred download {proto.label!r}")
+        return f'<p><a href="{href}" download>{escape(proto.label)}</a></p>'
+
+
+def static_downloads():
+    """Label -> loader of ``(bytes, file name)`` for the app's deferred downloads.
+
+    The explorer exports are written unfiltered, as at the widget defaults.
+    """
+    from data_store import DATASETS, dataset_path, load_bytes
+    from explorer import EXPORT_FORMATS, community_index
+    from exports import bundle_name, dataset_bundle
+    from results import DATASET_TITLES
+
+    def dataset(name):
+        return load_bytes(name), dataset_path(name)
+
+    def export(fmt, extension):
+        return community_index().export(fmt), f"macroinvertebrates.{extension}"
+
+    downloads = {
+        f"Download {DATASET_TITLES[name]}": partial(dataset, name) for name in DATASETS
+    }
+    downloads["Download all datasets (ZIP: XLSX, Parquet, CSV)"] = lambda: (dataset_bundle(), bundle_name())
+    for fmt, (extension, _) in EXPORT_FORMATS.items():
+        downloads[f"Download filtered rows ({fmt})"] = partial(export, fmt, extension)
+    return downloads
+
+
+def _records(data):
+    return json.loads(_arrow_frame(data).to_json(orient="records", date_format="iso"))
+
+
+def _recording_app_test():
+    """AppTest whose script runner keeps the media storage of the last run."""
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import AppTest, app_test
+
+    class RecordingRunner(app_test.LocalScriptRunner):
+        media = None
+
+        def run(self, *args, **kwargs):
+            tree = super().run(*args, **kwargs)
+            # AppTest installs a fresh in-memory media store per run
+            RecordingRunner.media = Runtime._instance.media_file_mgr._storage
+            return tree
+
+    app_test.LocalScriptRunner = RecordingRunner
+    return AppTest, RecordingRunner
+
+
+def _layout(title, nav, body, stylesheet, charts, notice=""):
+    scripts = "".join(f'<script src="{src}"></script>' for src in VEGA_SCRIPTS) if charts else ""
+    return (
+        "<!DOCTYPE html>\n"
+        f'<html lang="en"><head><meta charset="utf-8">'
+        f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f"<title>{escape(title)} · {escape(SITE_TITLE)}</title>"
+        f'<link rel="stylesheet" href="{stylesheet}">{scripts}</head>'
+        f"<body><nav>{nav}</nav><main>{notice}{body}</main></body></html>\n"
+    )
+
+
+def _nav(pages, current, documents):
+    links = "".join(
+        f'<a href="{page_file(page, i == 0)}"'
+        + (' class="current"' if page == current else "")
+        + f">{escape(page)}</a>"
+        for i, page in enumerate(pages)
+    )
+    docs = "".join(f'<a href="{href}" download>{escape(label)}</a>' for label, href in documents)
+    return f"<h3>Navigation</h3>{links}<h3>📄 Documents</h3>{docs}"
+
+
+def build(out_dir=DEFAULT_OUT, pages=None, live_url=None):
+    """Write the snapshot to ``out_dir``; returns the manifest."""
+    os.chdir(HERE)
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        if not os.path.exists(os.path.join(out_dir, "manifest.json")):
+            raise SystemExit(f"{out_dir} is not empty and holds no snapshot; refusing to replace it")
+        shutil.rmtree(out_dir)
+    assets = AssetWriter(out_dir)
+    stylesheet = assets.add(STYLESHEET, "style.css")
+    documents = [
+        (DOCUMENTS[name][1], assets.add(load_document(name), DOCUMENTS[name][0]))
+        for name in SIDEBAR_DOCUMENTS
+    ]
+
+    downloads = static_downloads()
+    AppTest, runner = _recording_app_test()
+    at = AppTest.from_file(APP, default_timeout=300).run()
+    all_pages = list(at.sidebar.radio[0].options)
+
+    manifest = {"pages": {}, "assets": {}}
+    for page in pages or all_pages:
+        at.sidebar.radio[0].set_value(page).run()
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].value}")
+
+        renderer = PageRenderer(assets, runner.media, downloads)
+        body = renderer.children(at.main)
+        notice = ""
+        if page == INTERACTIVE_PAGE and live_url:
+            notice = (
+                '<div class="alert alert-info">Static snapshot with default settings. '
+                f'<a href="{escape(live_url)}">Open the live app</a> to filter the datasets '
+                "and change the analysis options.</div>"
+            )
+        file_name = page_file(page, page == all_pages[0])
+        html = _layout(page, _nav(all_pages, page, documents), body, stylesheet,
+                       renderer.charts, notice)
+        with open(os.path.join(out_dir, file_name), "w", encoding="utf-8") as fh:
+            fh.write(html)
+        manifest["pages"][page] = file_name
+        print(f"{page:20s} -> {file_name}")
+
+    manifest["assets"] = dict(sorted(assets.files.items()))
+    with open(os.path.join(out_dir, "manifest.json"), "w") as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=DEFAULT_OUT, help="output directory (replaced)")
+    parser.add_argument("--pages", nargs="*", help="pages to render (default: every page)")
+    parser.add_argument("--live-url", help="URL of the live app, linked from the Results page")
+    args = parser.parse_args(argv)
+
+    manifest = build(os.path.abspath(args.out), args.pages, args.live_url)
+    total = sum(manifest["assets"].values())
+    print(f"{len(manifest['pages'])} pages, {len(manifest['assets'])} assets "
+          f"({total / 2**20:.1f} MB) written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
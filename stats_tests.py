@@ -0,0 +1,74 @@
+"""Paired significance tests used by the Results tables.
+
+Following the study's analysis plan, each comparison is checked for normality
+of the paired differences with Shapiro-Wilk; normal differences get a paired
+t-test, otherwise a Wilcoxon signed-rank test is used. Every test runs
+column-wise over all variables at once, and the per-variable choice is made
+afterwards with array masks.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+
+from data_store import STUDY_VARIABLES, load_water, season_versions
+
+ALPHA = 0.05
+
+
+def paired_tests(first, second, alpha=ALPHA):
+    """Paired tests of every column of ``first`` against ``second``.
+
+    ``first`` and ``second`` are aligned frames (rows are pairs, columns are
+    variables); pairs with a missing value are dropped per variable. Returns
+    one row per variable with the Shapiro-Wilk p of the differences, the
+    chosen test ("t" or "Z"), its statistic and the two-sided p value. The
+    Wilcoxon p is exact for small samples without ties, and its Z is the
+    normal approximation.
+    """
+    a = np.asarray(first, dtype=float)
+    b = np.asarray(second, dtype=float)
+    diff = a - b
+    with np.errstate(all="ignore"):
+        pairs = (~np.isnan(diff)).sum(axis=0)
+        varying = np.nanmax(diff, axis=0) > np.nanmin(diff, axis=0)
+
+        shapiro_p = np.full(diff.shape[1], np.nan)
+        testable = (pairs >= 3) & varying
+        if testable.any():
+            shapiro_p[testable] = stats.shapiro(diff[:, testable], axis=0, nan_policy="omit").pvalue
+
+        t = stats.ttest_rel(a, b, axis=0, nan_policy="omit")
+        w_exact = stats.wilcoxon(a, b, axis=0, nan_policy="omit")
+        w_approx = stats.wilcoxon(a, b, axis=0, method="approx", nan_policy="omit")
+
+    normal = shapiro_p > alpha
+    return pd.DataFrame({
+        "n": pairs,
+        "Shapiro p": shapiro_p,
+        "test": np.where(normal, "t", "Z"),
+        "statistic": np.where(normal, t.statistic, w_approx.zstatistic),
+        "p": np.where(normal, t.pvalue, w_exact.pvalue),
+    }, index=pd.Index(getattr(first, "columns", range(a.shape[1])), name="Variable"))
+
+
+@st.cache_data(show_spinner=False)
+def _water_quality_tests(versions, variables):
+    (first_season, _), (second_season, _) = versions
+    water = load_water()
+    water = water[water["season"].isin([first_season, second_season])]
+    wide = water.pivot_table(index="site", columns="season", values=list(variables))
+    first = wide.xs(first_season, axis=1, level="season")[list(variables)]
+    second = wide.xs(second_season, axis=1, level="season")[list(variables)]
+    return paired_tests(first, second)
+
+
+def water_quality_tests(variables=tuple(STUDY_VARIABLES), seasons=("S1", "S2")):
+    """Table 1: paired (by site) test of each water variable between two seasons.
+
+    Memoized per version of the two seasons and variable list, so ingesting
+    another season does not recompute existing comparisons.
+    """
+    versions = season_versions("water")
+    return _water_quality_tests(tuple((s, versions[s]) for s in seasons), tuple(variables))
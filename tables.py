@@ -0,0 +1,90 @@
+"""HTML builders for the styled result tables on the Results page."""
+
+from html import escape
+
+from metrics import timed
+from stats_tests import ALPHA
+
+BORDER = "border:1px solid black; padding:3px;"
+SIGNIFICANT = "color:red; font-weight:bold;"
+
+
+def _cell(text, style=""):
+    style = f"{BORDER} {style}".strip()
+    return f'<td style="{style}">{escape(str(text))}</td>'
+
+
+@timed("html_table")
+def html_table(columns, rows):
+    """Render rows of ``(text, style)`` cells under a grey header row."""
+    header = "".join(f'<th style="{BORDER}">{escape(c)}</th>' for c in columns)
+    body = "".join(
+        "<tr>" + "".join(_cell(text, style) for text, style in row) + "</tr>"
+        for row in rows
+    )
+    return (
+        '<table style="width:90%; border-collapse: collapse; font-size:12px;">'
+        f'<tr style="background-color:#f2f2f2;">{header}</tr>{body}</table>'
+    )
+
+
+def label_cell(label):
+    return (label, "color:blue;")
+
+
+def statistic_cell(result):
+    """``t = -9.446`` / ``Z = 2.666`` style test statistic cell."""
+    return (f"{result['test']} = {result['statistic']:.4g}", "")
+
+
+def p_value_cell(result, alpha=ALPHA):
+    """``p = 0.001953 P<0.05`` style p-value cell, highlighted when significant."""
+    p = result["p"]
+    if p < alpha:
+        return (f"p = {p:.5g} P<{alpha:g}", SIGNIFICANT)
+    return (f"p = {p:.5g}", "")
+
+
+def p_cell(result, alpha=ALPHA):
+    """``0.0136 (P<0.05)`` style p-value cell, highlighted when significant."""
+    if result is None:
+        return ("–", "")
+    p = result["p"]
+    if p < alpha:
+        return (f"{p:.5g} (P<{alpha:g})", SIGNIFICANT)
+    return (f"{p:.5g} (P>{alpha:g})", "")
+
+
+def significance_label(p, alpha=ALPHA):
+    if p < 0.01:
+        return "Highly significant"
+    if p < alpha:
+        return "Significant"
+    return "Not significant"
+
+
+def permanova_items(table, alpha=ALPHA):
+    """``<li>`` bullets summarising each PERMANOVA term."""
+    items = []
+    for term, row in table.dropna(subset=["p"]).iterrows():
+        style = SIGNIFICANT if row["p"] < alpha else ""
+        items.append(
+            f'<li><span style="color:blue;">{escape(term)}:</span> '
+            f'{significance_label(row["p"], alpha)} '
+            f'(<span style="{style}">p = {row["p"]:.3f}</span>, F = {row["F"]:.3f})</li>'
+        )
+    return "".join(items)
+
+
+def simper_items(table, first, second, top=2):
+    """``<li>`` bullets for the leading SIMPER taxa of a comparison."""
+    items = [
+        f'<li>{escape(row["Taxon"])}: {row["Contrib. %"]:.1f}% of dissimilarity, '
+        f'mean abundance {escape(first)} ({row[f"Mean {first}"]:.1f}) & '
+        f'{escape(second)} ({row[f"Mean {second}"]:.1f})</li>'
+        for _, row in table.head(top).iterrows()
+    ]
+    minor = (table["Contrib. %"] < 1).sum()
+    if minor:
+        items.append(f"<li>{minor} further taxa: &lt;1% each</li>")
+    return "".join(items)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial.distance import pdist, squareform
+
+from community import permanova, simper
+
+GROUP = {"Group": ["group"]}
+
+
+@pytest.fixture
+def grouped_counts():
+    rng = np.random.default_rng(1)
+    counts = rng.poisson([[8, 3, 1, 0, 5]] * 6 + [[2, 6, 4, 3, 0]] * 6)
+    samples = pd.DataFrame({"group": ["A"] * 6 + ["B"] * 6})
+    return samples, counts
+
+
+def naive_pseudo_f(distances, groups):
+    """One-way pseudo-F of Anderson (2001) from the squared distances."""
+    n = len(groups)
+    labels = sorted(set(groups))
+    ss_total = np.square(distances[np.triu_indices(n, 1)]).sum() / n
+    ss_within = 0.0
+    for label in labels:
+        idx = [i for i, g in enumerate(groups) if g == label]
+        sub = distances[np.ix_(idx, idx)]
+        ss_within += np.square(sub[np.triu_indices(len(idx), 1)]).sum() / len(idx)
+    a = len(labels)
+    return ((ss_total - ss_within) / (a - 1)) / (ss_within / (n - a))
+
+
+def test_permanova_pseudo_f_matches_naive(grouped_counts):
+    samples, counts = grouped_counts
+    distances = squareform(pdist(counts, "braycurtis"))
+    table = permanova(samples, distances, terms=GROUP, permutations=99, workers=1)
+    assert table.loc["Group", "F"] == pytest.approx(naive_pseudo_f(distances, samples["group"].tolist()))
+    assert table.loc["Total", "R²"] == pytest.approx(1.0)
+
+
+def test_permanova_p_independent_of_workers(grouped_counts):
+    samples, counts = grouped_counts
+    distances = squareform(pdist(counts, "braycurtis"))
+    serial = permanova(samples, distances, terms=GROUP, permutations=1200, seed=7, workers=1)
+    pooled = permanova(samples, distances, terms=GROUP, permutations=1200, seed=7, workers=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_simper_matches_hand_computation():
+    a = np.array([[4, 0, 2], [2, 2, 0]])
+    b = np.array([[0, 4, 2]])
+    table = simper(a, b, ["x", "y", "z"]).set_index("Taxon")
+
+    # Pair (a0, b): total 12, |4-0|, |0-4|, |2-2|; pair (a1, b): total 10, |2-0|, |2-4|, |0-2|
+    expected = {"x": (4 / 12 + 2 / 10) / 2, "y": (4 / 12 + 2 / 10) / 2, "z": (0 + 2 / 10) / 2}
+    for taxon, value in expected.items():
+        assert table.loc[taxon, "Av. dissim"] == pytest.approx(value * 100)
+    # Contributions add up to the mean Bray-Curtis dissimilarity between the groups
+    mean_bc = np.mean([pdist([row, b[0]], "braycurtis")[0] for row in a])
+    assert table["Av. dissim"].sum() == pytest.approx(mean_bc * 100)
+    assert table["Contrib. %"].sum() == pytest.approx(100)
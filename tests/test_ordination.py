@@ -0,0 +1,16 @@
+import numpy as np
+from scipy.spatial.distance import pdist
+
+from ordination import nmds, shepard
+
+
+def test_nmds_recovers_planar_configuration():
+    points = np.random.default_rng(5).normal(size=(15, 2))
+    # Any monotone transform of planar distances has a zero-stress 2-D solution
+    dissimilarities = np.sqrt(pdist(points))
+    fitted, stress, stresses = nmds(dissimilarities, starts=4, seed=1, workers=1)
+    assert stress < 0.01
+    assert stress == stresses.min()
+    table, r2 = shepard(dissimilarities, fitted)
+    assert r2["nonmetric"] > 0.99
+    assert np.all(np.diff(table["fitted"]) >= -1e-12)
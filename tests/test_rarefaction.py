@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.special import gammaln
+
+from rarefaction import rarefaction
+
+
+def hurlbert(abundances, m):
+    """Expected richness of a random subsample of ``m`` individuals (Hurlbert 1971)."""
+    n = abundances.sum()
+
+    def log_choose(a, b):
+        return gammaln(a + 1) - gammaln(b + 1) - gammaln(a - b + 1)
+
+    absent = np.array([
+        np.exp(log_choose(n - ni, m) - log_choose(n, m)) if n - ni >= m else 0.0
+        for ni in abundances
+    ])
+    return float((1 - absent).sum())
+
+
+def test_rarefied_richness_matches_hurlbert():
+    abundances = np.array([[40, 20, 10, 5, 3, 1, 1], [12, 9, 6, 2, 1, 0, 0]])
+    groups = pd.DataFrame({"season": ["S1", "S2"], "substrate": ["Plastic", "Plastic"]})
+    curves, _ = rarefaction(groups, abundances, replicates=4000, seed=3, workers=1)
+
+    interpolated = curves[curves["method"] != "extrapolated"]
+    assert len(interpolated) > 10
+    for row in interpolated.itertuples():
+        counts = abundances[0 if row.season == "S1" else 1]
+        assert row.richness == pytest.approx(hurlbert(counts, row.individuals), abs=0.05)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from data_store import STUDY_VARIABLES, load_water
+from stats_tests import ALPHA, water_quality_tests
+
+
+def test_water_quality_tests_match_scipy():
+    table = water_quality_tests()
+    water = load_water()
+    wide = water.pivot_table(index="site", columns="season", values=STUDY_VARIABLES, observed=True)
+
+    for variable in STUDY_VARIABLES:
+        pairs = wide[variable][["S1", "S2"]].dropna()
+        s1, s2 = pairs["S1"].to_numpy(float), pairs["S2"].to_numpy(float)
+        row = table.loc[variable]
+        if stats.shapiro(s1 - s2).pvalue > ALPHA:
+            expected = stats.ttest_rel(s1, s2)
+            assert row["test"] == "t"
+            assert row["statistic"] == pytest.approx(expected.statistic)
+        else:
+            expected = stats.wilcoxon(s1, s2)
+            assert row["test"] == "Z"
+            assert abs(row["statistic"]) == pytest.approx(
+                abs(stats.wilcoxon(s1, s2, method="approx").zstatistic)
+            )
+        assert row["p"] == pytest.approx(expected.pvalue)
+        assert np.isfinite(row["p"])